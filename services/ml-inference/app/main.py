@@ -1,11 +1,24 @@
 """FastAPI application for ML inference service."""
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-from typing import Optional
-import structlog
-import torch
+import os
+import sys
+
+# thread_config lives in src/, whose modules import each other as top-level modules.
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from thread_config import configure_thread_env, configure_thread_pools  # noqa: E402
+
+# Cap OpenMP/MKL threads before torch is imported to avoid oversubscribing cores.
+NUM_THREADS = configure_thread_env()
+
+from fastapi import FastAPI, HTTPException  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from pydantic import BaseModel, Field  # noqa: E402
+from typing import Optional  # noqa: E402
+import structlog  # noqa: E402
+import torch  # noqa: E402
+
+configure_thread_pools(NUM_THREADS)
 
 logger = structlog.get_logger()
 
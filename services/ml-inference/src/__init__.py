@@ -5,6 +5,11 @@ ML Inference Service - YOLOv8 + ByteTrack による選手・ボール検出・
 - detector: YOLOv8による検出
 - tracker: ByteTrackによるトラッキング
 - pipeline: 統合パイプライン
+- batcher: 動的バッチングスケジューラ
+- inference_worker: 共有メモリでフレームを受け渡す推論プロセス
+- thread_config: 推論スレッド数の設定
+- jobs: トラッキングジョブの状態管理
+- video_decoder: 複数プロセスによる並列動画デコード
 - api: FastAPIエンドポイント
 """
 
@@ -12,6 +17,7 @@ __version__ = "1.0.0"
 
 from .detector import (
     Detection,
+    Detections,
     PlayerBallDetector,
     create_detector
 )
@@ -29,12 +35,14 @@ from .pipeline import (
     BallData,
     PipelineResult,
     TrackingPipeline,
-    process_video_file
+    process_video_file,
+    process_many
 )
 
 __all__ = [
     # Detector
     "Detection",
+    "Detections",
     "PlayerBallDetector",
     "create_detector",
     # Tracker
@@ -49,4 +57,5 @@ __all__ = [
     "PipelineResult",
     "TrackingPipeline",
     "process_video_file",
+    "process_many",
 ]
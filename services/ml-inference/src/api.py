@@ -2,46 +2,131 @@
 FastAPI エンドポイント
 
 POST /detect - 単一フレームの検出
+POST /detect/raw - 非圧縮フレーム (NV12/BGR) の検出 (CUDA使用時はNV12をGPU上で変換)
 POST /track - 動画全体のトラッキング
 GET /health - ヘルスチェック
 """
 
-import base64
-import io
-import json
+import binascii
 import os
 import shutil
 import tempfile
 import time
 from contextlib import asynccontextmanager
-from pathlib import Path
-from typing import Dict, List, Optional, Annotated
+from typing import Dict, List, Optional
 import asyncio
+import functools
 from concurrent.futures import ThreadPoolExecutor
 
-import cv2
-import numpy as np
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
-import uvicorn
+from thread_config import configure_thread_env, configure_thread_pools
 
-from detector import PlayerBallDetector, Detection, create_detector
-from tracker import MultiClassTracker, create_tracker
-from pipeline import TrackingPipeline, PipelineConfig, PipelineResult
+# torch/numpyのimport前にOpenMP/MKLのスレッド数を設定 (スレッドの過剰生成を防ぐ)
+NUM_THREADS = configure_thread_env()
+
+import aiofiles  # noqa: E402
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+import orjson  # noqa: E402
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, BackgroundTasks, Header, Query, Request  # noqa: E402
+from fastapi.middleware.gzip import GZipMiddleware  # noqa: E402
+from fastapi.responses import ORJSONResponse  # noqa: E402
+from pydantic import BaseModel, Field  # noqa: E402
+import uvicorn  # noqa: E402
+
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR
+except ImportError:  # PyTurboJPEG未インストール時はOpenCVでデコード
+    TurboJPEG = None
+
+from detector import PlayerBallDetector, Detections, create_detector  # noqa: E402
+from tracker import MultiClassTracker, create_tracker  # noqa: E402
+from pipeline import TrackingPipeline, PipelineConfig  # noqa: E402
+from batcher import DynamicBatcher  # noqa: E402
+from inference_worker import InferenceWorker  # noqa: E402
+from jobs import JobStore  # noqa: E402
+from video_decoder import nv12_to_rgb  # noqa: E402
 
 
 # スレッドプール (lifespan外で定義)
 executor = ThreadPoolExecutor(max_workers=int(os.environ.get("MAX_WORKERS", "4")))
 
+# 動的バッチング設定
+MAX_BATCH_SIZE = int(os.environ.get("MAX_BATCH_SIZE", "8"))
+MAX_LATENCY_MS = float(os.environ.get("MAX_LATENCY_MS", "5"))
+
+# 推論デバイスとモデルのエクスポート設定
+# MODEL_EXPORT_FORMAT: "" (PyTorchのまま), "onnx", "engine" (TensorRT), "openvino"
+DEVICE = os.environ.get("DEVICE", "cpu")
+MODEL_EXPORT_FORMAT = os.environ.get("MODEL_EXPORT_FORMAT", "")
+MODEL_EXPORT_HALF = os.environ.get("MODEL_EXPORT_HALF", "true").lower() == "true"
+MODEL_EXPORT_INT8 = os.environ.get("MODEL_EXPORT_INT8", "false").lower() == "true"
+
+# 推論の実行先: "thread" (APIプロセス内のスレッドプール) または
+# "process" (専用の推論プロセス + 共有メモリでのフレーム受け渡し)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "thread")
+
+# レスポンス圧縮: この値 (バイト) 以上のレスポンスのみgzip圧縮する
+GZIP_MINIMUM_SIZE = int(os.environ.get("GZIP_MINIMUM_SIZE", "4096"))
+GZIP_COMPRESS_LEVEL = int(os.environ.get("GZIP_COMPRESS_LEVEL", "1"))
+
+# 終了したトラッキングジョブの結果を保持する秒数
+JOB_TTL_SECONDS = float(os.environ.get("JOB_TTL_SECONDS", "3600"))
+
+
+async def run_blocking(func, *args, **kwargs):
+    """CPU/GPUを占有する処理をスレッドプールで実行し、イベントループをブロックしない"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_detection_batch(frames: List[np.ndarray], params: tuple) -> List[Detections]:
+    """バッチ推論を実行 (params: (conf_threshold, detect_players, detect_ball))"""
+    conf_threshold, detect_players, detect_ball = params
+    detect_kwargs = {
+        "detect_players": detect_players,
+        "detect_ball": detect_ball,
+        "conf_threshold": conf_threshold
+    }
+    if inference_worker is not None:
+        return await inference_worker.detect_batch(frames, detect_kwargs)
+    return await run_blocking(detector.detect_batch, frames, **detect_kwargs)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan handler for startup and shutdown"""
-    global detector, tracker, pipeline
+    global detector, tracker, pipeline, batcher, jpeg_decoder, inference_worker
+
+    # Startup: torch/OpenCVのスレッドプールを設定
+    configure_thread_pools(NUM_THREADS)
+
+    # Startup: libjpeg-turbo (SIMD) のJPEGデコーダを初期化
+    if TurboJPEG is not None:
+        try:
+            jpeg_decoder = TurboJPEG()
+        except (OSError, RuntimeError) as e:
+            print(f"libjpeg-turbo unavailable, falling back to OpenCV decode: {e}")
 
     # Startup: Initialize detector, tracker, and pipeline
-    detector = create_detector(model_size="n", conf_threshold=0.3)
+    # MODEL_EXPORT_FORMAT指定時はONNX/TensorRT/OpenVINOにエクスポートした成果物を使用
+    # (成果物は精度・バッチサイズごとに重みの隣にキャッシュされるため、2回目以降の起動ではエクスポートしない)
+    detector_kwargs = {
+        "model_size": "n",
+        "conf_threshold": 0.3,
+        "device": DEVICE,
+        "export_format": MODEL_EXPORT_FORMAT or None,
+        "half": MODEL_EXPORT_HALF and DEVICE.startswith("cuda"),
+        "int8": MODEL_EXPORT_INT8,
+        "batch": MAX_BATCH_SIZE
+    }
+    if INFERENCE_BACKEND == "process":
+        # モデルは推論プロセス側でのみロードする
+        inference_worker = InferenceWorker(detector_kwargs, num_slots=MAX_BATCH_SIZE)
+        inference_worker.start()
+    else:
+        detector = create_detector(**detector_kwargs)
+        # 初回リクエストでの初期化待ちを避けるため、起動時に推論を済ませておく
+        await run_blocking(detector.warmup, batch_size=MAX_BATCH_SIZE)
     tracker = create_tracker(frame_rate=30, multi_class=True)
 
     config = PipelineConfig(
@@ -51,11 +136,23 @@ async def lifespan(app: FastAPI):
     )
     pipeline = TrackingPipeline(config)
 
+    # 検出リクエストを束ねるバッチャーを起動
+    batcher = DynamicBatcher(
+        run_detection_batch,
+        max_batch_size=MAX_BATCH_SIZE,
+        max_latency_ms=MAX_LATENCY_MS
+    )
+    await batcher.start()
+
     print("ML Inference API started successfully")
 
     yield
 
     # Shutdown: Cleanup
+    await batcher.stop()
+    pipeline.close()
+    if inference_worker is not None:
+        inference_worker.stop()
     executor.shutdown(wait=True)
     print("ML Inference API shut down")
 
@@ -65,16 +162,143 @@ app = FastAPI(
     title="Soccer Analyzer ML Inference API",
     description="YOLOv8 + ByteTrack による選手・ボール検出・トラッキングAPI",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson (C実装) でレスポンスをシリアライズ (numpy配列もそのまま出力可能)
+    default_response_class=ORJSONResponse
+)
+
+# トラッキング結果などの大きなレスポンスのみ圧縮し、/health や小さな検出結果は素通しにする
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=GZIP_MINIMUM_SIZE,
+    compresslevel=GZIP_COMPRESS_LEVEL
 )
 
 # グローバルな検出器とトラッカー
 detector: Optional[PlayerBallDetector] = None
 tracker: Optional[MultiClassTracker] = None
 pipeline: Optional[TrackingPipeline] = None
+batcher: Optional[DynamicBatcher] = None
+jpeg_decoder = None  # Optional[TurboJPEG]
+inference_worker: Optional[InferenceWorker] = None
 
 # 処理中のジョブを管理
-processing_jobs: Dict[str, Dict] = {}
+processing_jobs = JobStore(ttl_seconds=JOB_TTL_SECONDS)
+
+JPEG_SOI = b"\xff\xd8"
+UPLOAD_CHUNK_SIZE = 1 << 20  # 動画アップロードの書き込み単位 (1MB)
+DATA_URL_PREFIX = "data:"
+
+# /detect/raw で受け付ける画素フォーマットと、1画素あたりのバイト数 (分子, 分母)
+RAW_PIXEL_FORMATS = {
+    "nv12": (3, 2),  # Y面 (W*H) + UVインターリーブ面 (W*H/2)
+    "bgr": (3, 1),
+}
+
+
+def decode_base64_frame(frame_data: str) -> bytes:
+    """
+    Base64文字列 (data URL形式にも対応) を画像バイト列にデコード
+
+    data URL形式 (data:image/xxx;base64,XXXX) はカンマ以降のみを取り出し、
+    C実装のbinascii.a2b_base64で1回だけデコードする。
+    """
+    if frame_data.startswith(DATA_URL_PREFIX):
+        # カンマがない場合は find() が -1 を返すため全体をそのまま使う
+        frame_data = frame_data[frame_data.find(",") + 1:]
+    return binascii.a2b_base64(frame_data)
+
+
+def decode_image(
+    image_bytes: bytes,
+    width: Optional[int] = None,
+    height: Optional[int] = None
+) -> Optional[np.ndarray]:
+    """
+    画像バイト列をBGRフレームにデコード
+
+    JPEGはlibjpeg-turbo (利用可能な場合) で、それ以外はOpenCVでデコードする。
+    width/heightが指定され、データ長が一致する場合はRaw RGBとして解釈する。
+
+    Returns:
+        BGRフレーム、デコードできない場合はNone
+    """
+    frame = None
+    if jpeg_decoder is not None and image_bytes[:2] == JPEG_SOI:
+        try:
+            frame = jpeg_decoder.decode(image_bytes, pixel_format=TJPF_BGR)
+        except OSError:
+            frame = None
+
+    if frame is None:
+        frame = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+
+    # Raw RGB dataの場合、reshapeを試みる
+    if frame is None and width and height and len(image_bytes) == width * height * 3:
+        frame = np.frombuffer(image_bytes, dtype=np.uint8).reshape((height, width, 3))
+        frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+
+    return frame
+
+
+def decode_base64_image(frame_data: str, width: int, height: int) -> Optional[np.ndarray]:
+    """Base64文字列 (data URL形式にも対応) をBGRフレームにデコード"""
+    return decode_image(decode_base64_frame(frame_data), width, height)
+
+
+def detection_response(detections: Detections, start_time: float, model_id: str) -> ORJSONResponse:
+    """
+    検出結果のレスポンスを作成
+
+    DetectionResponseと同じ形のdictを直接シリアライズし、Pydanticでの検証・変換を省く
+    (response_modelはAPIドキュメント用にエンドポイントへ残す)。
+    """
+    return ORJSONResponse({
+        "detections": detections.to_dicts(),
+        "inferenceTimeMs": (time.time() - start_time) * 1000,
+        "modelId": model_id
+    })
+
+
+def raw_frame_device():
+    """NV12の生フレームをGPU上で変換して渡せる場合はそのCUDAデバイス (できない場合はNone)"""
+    # 推論プロセスへは共有メモリ経由でホストのフレームを渡すため、APIプロセス内の検出器のみ対象
+    if detector is None:
+        return None
+    device = detector.tensor_device
+    return device if device is not None and device.type == "cuda" else None
+
+
+def decode_raw_frame(data: bytes, width: int, height: int, pixel_format: str, device=None):
+    """
+    非圧縮の生フレーム (NV12 / BGR) を検出器に渡すフレームに変換
+
+    画像コーデックを通さないため、動画ソースのクライアントはJPEGエンコード/デコードを省略できる。
+    deviceを指定した場合、NV12はYUVのままデバイスへ転送してGPU上で (3, H, W) uint8 RGBの
+    テンソルに変換する (ホストでの色変換・letterboxを行わない)。それ以外はBGRのnumpy配列を返す。
+
+    Raises:
+        ValueError: フォーマットやデータ長が不正な場合
+    """
+    if pixel_format not in RAW_PIXEL_FORMATS:
+        raise ValueError(f"Unsupported pixel format: {pixel_format}")
+    if width <= 0 or height <= 0:
+        raise ValueError(f"Invalid frame size: {width}x{height}")
+    if pixel_format == "nv12" and (width % 2 or height % 2):
+        raise ValueError(f"NV12 frame size must be even, got {width}x{height}")
+
+    numerator, denominator = RAW_PIXEL_FORMATS[pixel_format]
+    expected = width * height * numerator // denominator
+    if len(data) != expected:
+        raise ValueError(f"Expected {expected} bytes for {width}x{height} {pixel_format}, got {len(data)}")
+
+    if pixel_format == "nv12" and device is not None:
+        return nv12_to_rgb(data, width, height, device)
+
+    pixels = np.frombuffer(data, dtype=np.uint8)
+    if pixel_format == "nv12":
+        return cv2.cvtColor(pixels.reshape((height * 3 // 2, width)), cv2.COLOR_YUV2BGR_NV12)
+    return pixels.reshape((height, width, 3))
 
 
 # --- リクエスト/レスポンスモデル ---
@@ -121,7 +345,7 @@ async def health_check():
         "status": "healthy",
         "timestamp": time.time(),
         "models": {
-            "detector": detector is not None,
+            "detector": detector is not None or inference_worker is not None,
             "tracker": tracker is not None,
             "pipeline": pipeline is not None
         }
@@ -143,55 +367,24 @@ async def detect_players_json(request: DetectJsonRequest):
 
     Base64エンコードされた画像から選手を検出
     """
-    if detector is None:
+    if batcher is None:
         raise HTTPException(status_code=500, detail="Detector not initialized")
 
     start_time = time.time()
 
     try:
-        import base64
-        # Base64デコード（data URL形式に対応）
-        frame_data = request.frameData
-        if frame_data.startswith("data:"):
-            # data URL形式: data:image/xxx;base64,XXXX
-            frame_data = frame_data.split(",", 1)[1] if "," in frame_data else frame_data
-
-        image_bytes = base64.b64decode(frame_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        # Raw RGB dataの場合、reshapeを試みる
-        if frame is None and len(image_bytes) == request.width * request.height * 3:
-            frame = np.frombuffer(image_bytes, dtype=np.uint8).reshape((request.height, request.width, 3))
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        # Base64デコード（data URL形式に対応）- スレッドプールで実行
+        frame = await run_blocking(
+            decode_base64_image, request.frameData, request.width, request.height
+        )
 
         if frame is None:
             raise HTTPException(status_code=400, detail="Invalid image data")
 
-        # 検出実行（選手のみ）- スレッドセーフにパラメータで閾値を渡す
-        detections = detector.detect(
-            frame,
-            detect_players=True,
-            detect_ball=False,
-            conf_threshold=request.confThreshold
-        )
+        # 検出実行（選手のみ）- 同時リクエストとまとめてバッチ推論
+        detections = await batcher.submit(frame, (request.confThreshold, True, False))
 
-        # レスポンス
-        detection_list = [
-            {
-                "bbox": {"x": det.bbox[0], "y": det.bbox[1], "w": det.bbox[2], "h": det.bbox[3]},
-                "confidence": det.confidence,
-                "classId": det.class_id,
-                "className": det.class_name
-            }
-            for det in detections
-        ]
-
-        return DetectionResponse(
-            detections=detection_list,
-            inferenceTimeMs=(time.time() - start_time) * 1000,
-            modelId="yolov8n-player"
-        )
+        return detection_response(detections, start_time, "yolov8n-player")
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
@@ -204,54 +397,24 @@ async def detect_ball_json(request: DetectJsonRequest):
 
     Base64エンコードされた画像からボールを検出
     """
-    if detector is None:
+    if batcher is None:
         raise HTTPException(status_code=500, detail="Detector not initialized")
 
     start_time = time.time()
 
     try:
-        import base64
-        # Base64デコード（data URL形式に対応）
-        frame_data = request.frameData
-        if frame_data.startswith("data:"):
-            frame_data = frame_data.split(",", 1)[1] if "," in frame_data else frame_data
-
-        image_bytes = base64.b64decode(frame_data)
-        nparr = np.frombuffer(image_bytes, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-
-        # Raw RGB dataの場合、reshapeを試みる
-        if frame is None and len(image_bytes) == request.width * request.height * 3:
-            frame = np.frombuffer(image_bytes, dtype=np.uint8).reshape((request.height, request.width, 3))
-            frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
+        # Base64デコード（data URL形式に対応）- スレッドプールで実行
+        frame = await run_blocking(
+            decode_base64_image, request.frameData, request.width, request.height
+        )
 
         if frame is None:
             raise HTTPException(status_code=400, detail="Invalid image data")
 
-        # 検出実行（ボールのみ）- スレッドセーフにパラメータで閾値を渡す
-        detections = detector.detect(
-            frame,
-            detect_players=False,
-            detect_ball=True,
-            conf_threshold=request.confThreshold
-        )
+        # 検出実行（ボールのみ）- 同時リクエストとまとめてバッチ推論
+        detections = await batcher.submit(frame, (request.confThreshold, False, True))
 
-        # レスポンス
-        detection_list = [
-            {
-                "bbox": {"x": det.bbox[0], "y": det.bbox[1], "w": det.bbox[2], "h": det.bbox[3]},
-                "confidence": det.confidence,
-                "classId": det.class_id,
-                "className": det.class_name
-            }
-            for det in detections
-        ]
-
-        return DetectionResponse(
-            detections=detection_list,
-            inferenceTimeMs=(time.time() - start_time) * 1000,
-            modelId="yolov8n-ball"
-        )
+        return detection_response(detections, start_time, "yolov8n-ball")
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
@@ -276,7 +439,7 @@ async def detect_frame(
     Returns:
         検出結果
     """
-    if detector is None:
+    if batcher is None:
         raise HTTPException(status_code=500, detail="Detector not initialized")
 
     start_time = time.time()
@@ -284,49 +447,58 @@ async def detect_frame(
     try:
         # 画像を読み込み
         contents = await image.read()
-        nparr = np.frombuffer(contents, np.uint8)
-        frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        frame = await run_blocking(decode_image, contents)
 
         if frame is None:
             raise HTTPException(status_code=400, detail="Invalid image format")
 
-        # 信頼度閾値を更新
-        original_threshold = detector.conf_threshold
-        detector.conf_threshold = conf_threshold
+        # 検出実行 - 閾値はパラメータで渡し、同時リクエストとまとめてバッチ推論
+        detections = await batcher.submit(frame, (conf_threshold, detect_players, detect_ball))
+
+        return detection_response(detections, start_time, "yolov8n")
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
 
-        # 検出実行
-        detections = detector.detect(
-            frame,
-            detect_players=detect_players,
-            detect_ball=detect_ball
-        )
 
-        # 閾値を戻す
-        detector.conf_threshold = original_threshold
-
-        # レスポンスを構築
-        detection_list = [
-            {
-                "bbox": {
-                    "x": det.bbox[0],
-                    "y": det.bbox[1],
-                    "w": det.bbox[2],
-                    "h": det.bbox[3]
-                },
-                "confidence": det.confidence,
-                "classId": det.class_id,
-                "className": det.class_name
-            }
-            for det in detections
-        ]
-
-        inference_time_ms = (time.time() - start_time) * 1000
-
-        return DetectionResponse(
-            detections=detection_list,
-            inferenceTimeMs=inference_time_ms,
-            modelId="yolov8n"
+@app.post("/detect/raw", response_model=DetectionResponse)
+async def detect_raw_frame(
+    request: Request,
+    x_frame_width: int = Header(..., description="フレームの幅"),
+    x_frame_height: int = Header(..., description="フレームの高さ"),
+    x_pixel_format: str = Header(default="nv12", description="画素フォーマット (nv12, bgr)"),
+    conf_threshold: float = Query(default=0.3, ge=0.0, le=1.0),
+    detect_players: bool = Query(default=True),
+    detect_ball: bool = Query(default=True)
+):
+    """
+    生フレームの検出 (application/octet-stream)
+
+    リクエストボディに非圧縮のフレーム (NV12またはBGR) をそのまま送る。
+    フレームサイズと画素フォーマットはヘッダーで指定する。
+    検出器がCUDA上で直接推論できる場合、NV12はGPU上でRGBに変換してそのまま推論する。
+
+    Returns:
+        検出結果
+    """
+    if batcher is None:
+        raise HTTPException(status_code=500, detail="Detector not initialized")
+
+    start_time = time.time()
+
+    body = await request.body()
+    try:
+        frame = await run_blocking(
+            decode_raw_frame, body, x_frame_width, x_frame_height, x_pixel_format.lower(),
+            raw_frame_device()
         )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        detections = await batcher.submit(frame, (conf_threshold, detect_players, detect_ball))
+
+        return detection_response(detections, start_time, "yolov8n")
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Detection failed: {str(e)}")
@@ -353,30 +525,31 @@ async def track_video(
 
     try:
         # 設定をパース
-        import json
-        config_dict = json.loads(config) if config else {}
+        config_dict = orjson.loads(config) if config else {}
         request_config = TrackingRequest(**config_dict)
 
         # 一時ファイルに動画を保存
         temp_dir = tempfile.mkdtemp()
         video_path = os.path.join(temp_dir, video.filename or "video.mp4")
 
-        with open(video_path, "wb") as f:
-            contents = await video.read()
-            f.write(contents)
+        # 全体をメモリに読み込まず、チャンク単位で非同期にディスクへ書き込む
+        async with aiofiles.open(video_path, "wb") as f:
+            while chunk := await video.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
 
         # ジョブIDを生成
         job_id = f"job_{int(time.time() * 1000)}"
 
         # ジョブステータスを初期化
-        processing_jobs[job_id] = {
-            "status": "processing",
-            "progress": 0.0,
-            "result": None,
-            "error": None,
-            "video_path": video_path,
-            "temp_dir": temp_dir
-        }
+        processing_jobs.create(
+            job_id,
+            status="processing",
+            progress=0.0,
+            result=None,
+            error=None,
+            video_path=video_path,
+            temp_dir=temp_dir
+        )
 
         # バックグラウンドでトラッキングを実行
         background_tasks.add_task(
@@ -408,11 +581,10 @@ async def get_tracking_status(job_id: str):
     Returns:
         ジョブステータス
     """
-    if job_id not in processing_jobs:
+    job = processing_jobs.get(job_id)
+    if job is None:
         raise HTTPException(status_code=404, detail="Job not found")
 
-    job = processing_jobs[job_id]
-
     return JobStatusResponse(
         jobId=job_id,
         status=job["status"],
@@ -439,29 +611,27 @@ def process_tracking_job(
             device=request_config.device,
             frame_rate=request_config.frameRate,
             skip_frames=request_config.skipFrames,
-            max_frames=request_config.maxFrames
+            max_frames=request_config.maxFrames,
+            export_format=MODEL_EXPORT_FORMAT or None
         )
 
-        # パイプラインを作成
+        # パイプラインを作成 (同じ設定の検出器はジョブ間で使い回される)
         job_pipeline = TrackingPipeline(config)
 
         # 進捗コールバック
         def progress_callback(current: int, total: int):
             progress = current / total if total > 0 else 0.0
-            processing_jobs[job_id]["progress"] = progress
+            processing_jobs.update(job_id, progress=progress)
 
-        # トラッキング実行
-        result = job_pipeline.process_video(video_path, progress_callback)
+        # トラッキング実行 (パイプラインの書き込み用スレッドはジョブごとに閉じる)
+        try:
+            result = job_pipeline.process_video(video_path, progress_callback)
+        finally:
+            job_pipeline.close()
 
         # 結果を構築
         result_data = {
-            "tracks": [
-                {
-                    "trackId": track.trackId,
-                    "frames": track.frames
-                }
-                for track in result.tracks
-            ],
+            "tracks": result.track_dicts(),
             "ball": [
                 {
                     "frameNumber": ball.frameNumber,
@@ -476,14 +646,11 @@ def process_tracking_job(
         }
 
         # ジョブステータスを更新
-        processing_jobs[job_id]["status"] = "completed"
-        processing_jobs[job_id]["progress"] = 1.0
-        processing_jobs[job_id]["result"] = result_data
+        processing_jobs.update(job_id, status="completed", progress=1.0, result=result_data)
 
     except Exception as e:
         # エラー時
-        processing_jobs[job_id]["status"] = "error"
-        processing_jobs[job_id]["error"] = str(e)
+        processing_jobs.update(job_id, status="error", error=str(e))
 
     finally:
         # 一時ファイルをクリーンアップ（再帰的に削除）
@@ -0,0 +1,155 @@
+"""
+動的バッチングスケジューラ
+
+同時に到着した複数リクエストのフレームをまとめ、1回の推論呼び出しで処理する。
+最大 max_batch_size 件、または最初のフレーム到着から max_latency_ms 経過した時点で
+バッチを確定し、パラメータとフレームの形状が一致するリクエスト同士のみを同じバッチにまとめる
+(letterboxのサイズはバッチ内で共有されるため、形状の異なるフレームを混ぜると結果が変わる)。
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+
+import numpy as np
+
+
+# バッチ実行関数: (フレームのリスト, パラメータ) -> フレームごとの結果のリスト
+RunBatch = Callable[[List[np.ndarray], Hashable], Awaitable[List[Any]]]
+
+
+@dataclass
+class _PendingFrame:
+    """キュー内で待機中のフレーム"""
+
+    frame: np.ndarray
+    params: Hashable
+    future: asyncio.Future
+
+
+class DynamicBatcher:
+    """リクエストを束ねて推論するマイクロバッチキュー"""
+
+    def __init__(
+        self,
+        run_batch: RunBatch,
+        max_batch_size: int = 8,
+        max_latency_ms: float = 5.0
+    ):
+        """
+        Args:
+            run_batch: バッチ推論を実行するコルーチン関数
+            max_batch_size: 1バッチあたりの最大フレーム数
+            max_latency_ms: バッチを確定するまでの最大待機時間 (ミリ秒)
+        """
+        if max_batch_size < 1:
+            raise ValueError(f"max_batch_size must be >= 1, got {max_batch_size}")
+
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._consumer: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """コンシューマタスクを起動"""
+        if self._consumer is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._consumer = asyncio.create_task(self._consume())
+
+    async def stop(self):
+        """コンシューマタスクを停止し、未処理のリクエストをキャンセル"""
+        if self._consumer is None:
+            return
+
+        self._consumer.cancel()
+        try:
+            await self._consumer
+        except asyncio.CancelledError:
+            pass
+        self._consumer = None
+
+        while not self._queue.empty():
+            pending = self._queue.get_nowait()
+            if not pending.future.done():
+                pending.future.cancel()
+
+    async def submit(self, frame: np.ndarray, params: Hashable) -> Any:
+        """
+        フレームをキューに投入し、推論結果を待つ
+
+        Args:
+            frame: 入力フレーム (numpy array, BGR format)
+            params: 推論パラメータ (同じ値かつ同じ形状のフレームのみ同一バッチになる)
+
+        Returns:
+            このフレームに対する推論結果
+        """
+        if self._consumer is None:
+            raise RuntimeError("DynamicBatcher is not started")
+
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(_PendingFrame(frame=frame, params=params, future=future))
+        return await future
+
+    async def _consume(self):
+        """キューからバッチを組み立てて順に実行する"""
+        loop = asyncio.get_running_loop()
+
+        while True:
+            batch = [await self._queue.get()]
+            try:
+                await self._collect(batch, loop.time() + self.max_latency)
+                await self._run_groups(batch)
+            except asyncio.CancelledError:
+                # 停止時はキューから取り出し済み (推論中・未実行) のリクエストもキャンセルする
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.cancel()
+                raise
+
+    async def _collect(self, batch: List[_PendingFrame], deadline: float):
+        """最大件数または最大待機時間に達するまでbatchにリクエストを集める"""
+        loop = asyncio.get_running_loop()
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+
+    async def _run_groups(self, batch: List[_PendingFrame]):
+        """パラメータとフレームの種類・形状が一致するリクエストごとにグループ化して実行"""
+        groups: Dict[Hashable, List[_PendingFrame]] = {}
+        for pending in batch:
+            # クライアント切断等でキャンセル済みのものは推論しない
+            if pending.future.done():
+                continue
+            key = (pending.params, type(pending.frame), tuple(pending.frame.shape))
+            groups.setdefault(key, []).append(pending)
+
+        for (params, _frame_type, _shape), items in groups.items():
+            await self._dispatch(params, items)
+
+    async def _dispatch(self, params: Hashable, items: List[_PendingFrame]):
+        """1グループ分のバッチ推論を実行し、結果を各リクエストに返す"""
+        try:
+            results = await self.run_batch([item.frame for item in items], params)
+            if len(results) != len(items):
+                # 結果が欠けたリクエストが待ち続けないよう、バッチ全体を失敗させる
+                raise RuntimeError(
+                    f"Batch runner returned {len(results)} results for {len(items)} frames"
+                )
+        except Exception as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+
+        for item, result in zip(items, results, strict=True):
+            if not item.future.done():
+                item.future.set_result(result)
@@ -2,17 +2,26 @@
 YOLOv8による選手・ボール検出モジュール
 
 入力: フレーム画像 (numpy array)
-出力: List[Detection] (bbox, confidence, class_id)
+出力: Detections (bbox, confidence, class_id の配列)
 クラス: person (選手), sports ball (ボール)
 """
 
+import copy
+import math
+import os
+import threading
 from dataclasses import dataclass
-from typing import List, Optional, Tuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import cv2
 import numpy as np
+import torch
 from ultralytics import YOLO
+from ultralytics.nn.autobackend import AutoBackend
+from ultralytics.utils import ops
 
 
-@dataclass
+@dataclass(slots=True)
 class Detection:
     """検出結果を表すデータクラス"""
 
@@ -22,6 +31,108 @@ class Detection:
     class_name: str  # "person" or "sports ball"
 
 
+@dataclass(slots=True)
+class Detections:
+    """
+    1フレーム分の検出結果 (Structure of Arrays)
+
+    検出ごとにDetectionを生成せず、列ごとのNumPy配列で保持する。
+    イテレーションすると従来どおりDetectionを返すため、List[Detection]を
+    前提とした呼び出し側はそのまま動作する。
+    """
+
+    bbox: np.ndarray  # (N, 4) (x, y, w, h) in normalized coordinates (0-1)
+    confidence: np.ndarray  # (N,) 0-1
+    class_id: np.ndarray  # (N,) COCO class ID
+    names: Dict[int, str]  # class_id -> class_name
+
+    @classmethod
+    def empty(cls, names: Dict[int, str]) -> "Detections":
+        """検出なしの結果を作成"""
+        return cls(
+            bbox=np.empty((0, 4), dtype=np.float64),
+            confidence=np.empty((0,), dtype=np.float32),
+            class_id=np.empty((0,), dtype=np.int32),
+            names=names
+        )
+
+    def __len__(self) -> int:
+        return len(self.class_id)
+
+    def __iter__(self) -> Iterator[Detection]:
+        return iter(self.to_list())
+
+    def __getitem__(self, index: Union[int, np.ndarray, slice]) -> Union[Detection, "Detections"]:
+        """整数インデックスはDetection、マスク/スライスはDetectionsを返す"""
+        if isinstance(index, (int, np.integer)):
+            class_id = int(self.class_id[index])
+            return Detection(
+                bbox=tuple(self.bbox[index].tolist()),
+                confidence=float(self.confidence[index]),
+                class_id=class_id,
+                class_name=self.names[class_id]
+            )
+        return Detections(
+            bbox=self.bbox[index],
+            confidence=self.confidence[index],
+            class_id=self.class_id[index],
+            names=self.names
+        )
+
+    def to_list(self) -> List[Detection]:
+        """従来のList[Detection]形式に変換"""
+        names = self.names
+        return [
+            Detection(
+                bbox=tuple(bbox),
+                confidence=confidence,
+                class_id=class_id,
+                class_name=names[class_id]
+            )
+            for bbox, confidence, class_id in zip(
+                self.bbox.tolist(), self.confidence.tolist(), self.class_id.tolist(), strict=True
+            )
+        ]
+
+    def to_dicts(self) -> List[Dict]:
+        """APIレスポンス形式 (camelCase) のdictリストに変換"""
+        names = self.names
+        return [
+            {
+                "bbox": {"x": x, "y": y, "w": w, "h": h},
+                "confidence": confidence,
+                "classId": class_id,
+                "className": names[class_id]
+            }
+            for (x, y, w, h), confidence, class_id in zip(
+                self.bbox.tolist(), self.confidence.tolist(), self.class_id.tolist(), strict=True
+            )
+        ]
+
+
+def normalize_boxes(
+    xyxy: np.ndarray,
+    width: int,
+    height: int,
+    out: np.ndarray
+) -> np.ndarray:
+    """
+    ピクセル座標のxyxyボックスを正規化座標 (0-1) のxywhに変換
+
+    一時配列を作らずにoutへ直接書き込む (outはxyxyと同じ形状 (N, 4))。
+
+    Returns:
+        out
+    """
+    # (x1, y1) をコピーし、(x2, y2) - (x1, y1) で幅・高さを求める
+    out[:, :2] = xyxy[:, :2]
+    np.subtract(xyxy[:, 2:], xyxy[:, :2], out=out[:, 2:])
+    # 除算ではなく逆数の乗算で正規化する
+    out[:, 0::2] *= 1.0 / width
+    out[:, 1::2] *= 1.0 / height
+    return out
+
+
 class PlayerBallDetector:
     """YOLOv8を使用した選手・ボール検出器"""
 
@@ -29,12 +140,26 @@ class PlayerBallDetector:
     PERSON_CLASS_ID = 0
     SPORTS_BALL_CLASS_ID = 32
 
+    # (detect_players, detect_ball) -> 検出対象クラス (呼び出しごとにリストを組み立てない)
+    _CLASSES: Dict[Tuple[bool, bool], List[int]] = {
+        (True, True): [PERSON_CLASS_ID, SPORTS_BALL_CLASS_ID],
+        (True, False): [PERSON_CLASS_ID],
+        (False, True): [SPORTS_BALL_CLASS_ID],
+        (False, False): [],
+    }
+
+    # 前処理済み推論パスの設定
+    IMGSZ = 640  # letterbox後の最大辺
+    LETTERBOX_FILL = 114  # 余白の画素値 (Ultralyticsと同じ)
+    MAX_DET = 300  # 1フレームあたりの最大検出数
+
     def __init__(
         self,
         model_path: str = "yolov8n.pt",
         conf_threshold: float = 0.3,
         iou_threshold: float = 0.5,
-        device: str = "cpu"
+        device: str = "cpu",
+        half: bool = False
     ):
         """
         Args:
@@ -42,29 +167,77 @@ class PlayerBallDetector:
             conf_threshold: 信頼度閾値 (0-1)
             iou_threshold: IoU閾値 (NMS用)
             device: 使用デバイス ("cpu", "cuda", "mps")
+            half: FP16で推論するか (CUDA/MPSのみ。CPUではFP32で推論する)
 
         Raises:
             RuntimeError: モデルのロードに失敗した場合
         """
         try:
-            self.model = YOLO(model_path)
+            self.model = YOLO(model_path, task="detect")
         except Exception as e:
             raise RuntimeError(f"Failed to load YOLO model from {model_path}: {e}") from e
 
-        self.conf_threshold = conf_threshold
+        # 並行リクエスト間で共有されるため生成後は変更しない (閾値は呼び出しごとに渡す)
+        self._conf_threshold = conf_threshold
         self.iou_threshold = iou_threshold
         self.device = device
+        if half and not device.startswith(("cuda", "mps")):
+            print(f"FP16 inference is not supported on {device}, using FP32")
+            half = False
+        self.half = half
 
         # 検出対象クラスを制限
         self.target_classes = [self.PERSON_CLASS_ID, self.SPORTS_BALL_CLASS_ID]
 
+        # predict() (Resultsの生成やコールバック等) を経由せず、前処理バッファを
+        # 使い回してモデルとNMSを直接呼び出す
+        self._backend: Optional[AutoBackend] = None
+        self._lock = threading.Lock()
+        self._host_buffer: Optional[torch.Tensor] = None
+        self._device_buffer: Optional[torch.Tensor] = None
+        self._copy_stream = None
+        try:
+            self._setup_preprocessed_path(model_path)
+        except Exception as e:
+            print(f"Direct inference path unavailable, using predict(): {e}")
+            self._backend = None
+
+    @property
+    def conf_threshold(self) -> float:
+        """デフォルトの信頼度閾値 (読み取り専用)"""
+        return self._conf_threshold
+
+    @property
+    def tensor_device(self) -> Optional[torch.device]:
+        """デバイス上のフレームテンソルをそのまま推論できる場合はそのデバイス (できない場合はNone)"""
+        return self._backend.device if self._backend is not None else None
+
+    def _setup_preprocessed_path(self, model_path: str):
+        """前処理済みテンソルを直接モデルに渡す推論パスを準備"""
+        model = self.model.model
+        # AutoBackendはモジュールをその場でfuse (FP16の場合はhalfにも変換) するため、
+        # predict() のフォールバックが使う self.model.model を変更しないようコピーを渡す
+        weights = copy.deepcopy(model) if isinstance(model, torch.nn.Module) else model_path
+        # FP16の場合はモデルの重みをhalfに変換する (入力はデバイス上でuint8から直接halfにする)
+        self._backend = AutoBackend(
+            weights,
+            device=torch.device(self.device),
+            fp16=self.half,
+            fuse=True,
+            verbose=False
+        )
+        self._backend.eval()
+        if self._backend.device.type == "cuda":
+            # H2D転送を推論と別ストリームで行う
+            self._copy_stream = torch.cuda.Stream(device=self._backend.device)
+
     def detect(
         self,
         frame: np.ndarray,
         detect_players: bool = True,
         detect_ball: bool = True,
         conf_threshold: Optional[float] = None
-    ) -> List[Detection]:
+    ) -> Detections:
         """
         フレーム内の選手とボールを検出
 
@@ -75,79 +248,314 @@ class PlayerBallDetector:
             conf_threshold: 信頼度閾値（Noneの場合はインスタンスのデフォルト値を使用）
 
         Returns:
-            検出結果のリスト
+            検出結果 (Detections)
         """
-        # 検出対象クラスを決定
-        classes = []
-        if detect_players:
-            classes.append(self.PERSON_CLASS_ID)
-        if detect_ball:
-            classes.append(self.SPORTS_BALL_CLASS_ID)
+        return self.detect_batch(
+            [frame],
+            detect_players=detect_players,
+            detect_ball=detect_ball,
+            conf_threshold=conf_threshold
+        )[0]
+
+    def detect_batch(
+        self,
+        frames: Sequence[np.ndarray],
+        detect_players: bool = True,
+        detect_ball: bool = True,
+        conf_threshold: Optional[float] = None
+    ) -> List[Detections]:
+        """
+        複数フレームをまとめて1回の推論で検出
+
+        Args:
+            frames: 入力フレームのリスト (numpy array, BGR format)
+                またはGPUデコードしたフレームのリスト (torch.Tensor (3, H, W) uint8, RGB)
+            detect_players: 選手を検出するか
+            detect_ball: ボールを検出するか
+            conf_threshold: 信頼度閾値（Noneの場合はインスタンスのデフォルト値を使用）
+
+        Returns:
+            フレームごとの検出結果のリスト (入力と同じ順序)
+        """
+        # 検出対象クラスを決定 (共有のリストなので変更しないこと)
+        classes = self._CLASSES[(bool(detect_players), bool(detect_ball))]
 
         if not classes:
-            return []
+            return [Detections.empty(self.model.names) for _ in frames]
+
+        if frames and all(isinstance(frame, torch.Tensor) for frame in frames):
+            # GPUデコードされたフレーム (3, H, W) uint8 RGB
+            for frame in frames:
+                if frame.ndim != 3 or frame.shape[0] != 3:
+                    raise ValueError(f"Frame tensor must have shape (3, H, W), got {tuple(frame.shape)}")
+            effective_conf = conf_threshold if conf_threshold is not None else self.conf_threshold
+            if self._backend is not None:
+                return self._detect_tensor_batch(frames, classes, effective_conf)
+            # 直接推論できない場合はホストのBGRフレームに変換してpredict()を使う
+            frames = [frame.permute(1, 2, 0).flip(-1).contiguous().cpu().numpy() for frame in frames]
 
         # フレームのバリデーション
-        if frame is None or not isinstance(frame, np.ndarray):
-            raise ValueError("Frame must be a valid numpy array")
-        if len(frame.shape) < 2:
-            raise ValueError(f"Frame must have at least 2 dimensions, got shape {frame.shape}")
+        for frame in frames:
+            if frame is None or not isinstance(frame, np.ndarray):
+                raise ValueError("Frame must be a valid numpy array")
+            if len(frame.shape) < 2:
+                raise ValueError(f"Frame must have at least 2 dimensions, got shape {frame.shape}")
 
-        # フレームサイズを取得
-        height, width = frame.shape[:2]
+        if not frames:
+            return []
 
         # 使用する閾値を決定（パラメータ優先）
         effective_conf = conf_threshold if conf_threshold is not None else self.conf_threshold
 
-        # YOLOv8で推論
-        results = self.model.predict(
-            frame,
-            conf=effective_conf,
-            iou=self.iou_threshold,
-            classes=classes,
-            device=self.device,
-            verbose=False
-        )
+        if self._backend is not None and all(
+            frame.ndim == 3 and frame.shape[2] == 3 for frame in frames
+        ):
+            return self._detect_batch_preprocessed(frames, classes, effective_conf)
+
+        # YOLOv8でバッチ推論
+        # (Ultralyticsのpredictorは再入可能ではないため、検出器を共有するスレッド間で直列化する)
+        with self._lock:
+            results = self.model.predict(
+                list(frames),
+                conf=effective_conf,
+                iou=self.iou_threshold,
+                classes=classes,
+                device=self.device,
+                half=self.half,
+                verbose=False
+            )
+
+            return [
+                self._convert_result(result, frame.shape[1], frame.shape[0])
+                for frame, result in zip(frames, results, strict=True)
+            ]
+
+    def _detect_batch_preprocessed(
+        self,
+        frames: Sequence[np.ndarray],
+        classes: List[int],
+        conf: float
+    ) -> List[Detections]:
+        """
+        使い回しの入力バッファでletterbox前処理を行い、モデルを直接呼び出して検出
 
-        # 結果を変換
-        detections = []
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                # バウンディングボックス (xyxy形式)
-                x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-
-                # 正規化座標に変換 (0-1)、Python floatに変換
-                x_norm = float(x1 / width)
-                y_norm = float(y1 / height)
-                w_norm = float((x2 - x1) / width)
-                h_norm = float((y2 - y1) / height)
-
-                # 信頼度とクラスID
-                confidence = float(box.conf[0])
-                class_id = int(box.cls[0])
-
-                # クラス名を取得
-                class_name = self.model.names[class_id]
-
-                detection = Detection(
-                    bbox=(x_norm, y_norm, w_norm, h_norm),
-                    confidence=confidence,
-                    class_id=class_id,
-                    class_name=class_name
-                )
-                detections.append(detection)
+        letterboxの配置 (中央寄せ・余白値) はUltralyticsのLetterBoxと同じにする。
+        """
+        sizes = [frame.shape[:2] for frame in frames]
+        plan, offsets, batch_h, batch_w = self._letterbox_layout(sizes)
+
+        with self._lock:
+            host, device_buffer = self._get_input_buffers(len(frames), batch_h, batch_w)
+            host_np = host.numpy()
+            host_np.fill(self.LETTERBOX_FILL)
+            for dst, frame, (_ratio, nw, nh), (left, top) in zip(
+                host_np, frames, plan, offsets, strict=True
+            ):
+                if (nw, nh) == (frame.shape[1], frame.shape[0]):
+                    dst[top:top + nh, left:left + nw] = frame
+                else:
+                    dst[top:top + nh, left:left + nw] = cv2.resize(
+                        frame, (nw, nh), interpolation=cv2.INTER_LINEAR
+                    )
+
+            if self._copy_stream is not None:
+                with torch.cuda.stream(self._copy_stream):
+                    device_buffer.copy_(host, non_blocking=True)
+                torch.cuda.current_stream(self._backend.device).wait_stream(self._copy_stream)
+            elif self._device_buffer is not self._host_buffer:
+                device_buffer.copy_(host)
+
+            # BHWC(BGR) uint8 → BCHW(RGB) float 0-1 (デバイス上で変換)
+            im = device_buffer.permute(0, 3, 1, 2).flip(1)
+            im = im.half() if self._backend.fp16 else im.float()
+            im /= 255
+
+            merged, counts = self._run_model(im, classes, conf)
+
+        return self._build_detections(sizes, plan, offsets, merged, counts)
+
+    def _detect_tensor_batch(
+        self,
+        frames: Sequence[torch.Tensor],
+        classes: List[int],
+        conf: float
+    ) -> List[Detections]:
+        """
+        デバイス上のフレーム (3, H, W) uint8 RGB をそのままletterboxして検出
+
+        GPUでデコードしたフレームをホストへ転送せずに推論する。
+        """
+        sizes = [tuple(frame.shape[-2:]) for frame in frames]
+        plan, offsets, batch_h, batch_w = self._letterbox_layout(sizes)
+        device = self._backend.device
+        dtype = torch.half if self._backend.fp16 else torch.float
+
+        with self._lock:
+            im = torch.full(
+                (len(frames), 3, batch_h, batch_w),
+                self.LETTERBOX_FILL,
+                dtype=dtype,
+                device=device
+            )
+            for dst, frame, (_ratio, nw, nh), (left, top) in zip(
+                im, frames, plan, offsets, strict=True
+            ):
+                src = frame.to(device, non_blocking=True)
+                if (nh, nw) != tuple(src.shape[-2:]):
+                    src = torch.nn.functional.interpolate(
+                        src[None].to(dtype), size=(nh, nw), mode="bilinear", align_corners=False
+                    )[0]
+                dst[:, top:top + nh, left:left + nw] = src
+            im /= 255
+
+            merged, counts = self._run_model(im, classes, conf)
+
+        return self._build_detections(sizes, plan, offsets, merged, counts)
+
+    def _letterbox_layout(
+        self,
+        sizes: Sequence[Tuple[int, int]]
+    ) -> Tuple[List[Tuple[float, int, int]], List[Tuple[int, int]], int, int]:
+        """
+        フレームサイズ (height, width) のリストからletterboxの配置を求める
 
+        Returns:
+            ([(倍率, 縮小後の幅, 縮小後の高さ)], [(左の余白, 上の余白)], 入力の高さ, 入力の幅)
+        """
+        stride = int(self._backend.stride)
+        plan = []
+        for height, width in sizes:
+            ratio = min(self.IMGSZ / height, self.IMGSZ / width)
+            plan.append((ratio, int(round(width * ratio)), int(round(height * ratio))))
+
+        if self._backend.pt:
+            # PyTorchモデルはstrideの倍数であれば任意サイズを受け付ける (矩形推論)
+            batch_w = math.ceil(max(nw for _, nw, _ in plan) / stride) * stride
+            batch_h = math.ceil(max(nh for _, _, nh in plan) / stride) * stride
+        else:
+            batch_w = batch_h = self.IMGSZ
+
+        # 各フレームの余白 (左, 上) を求める
+        offsets = [
+            (int(round((batch_w - nw) / 2 - 0.1)), int(round((batch_h - nh) / 2 - 0.1)))
+            for _, nw, nh in plan
+        ]
+        return plan, offsets, batch_h, batch_w
+
+    def _run_model(
+        self,
+        im: torch.Tensor,
+        classes: List[int],
+        conf: float
+    ) -> Tuple[np.ndarray, List[int]]:
+        """前処理済みの入力でモデルとNMSを実行し、(全フレームの検出行, フレームごとの件数) を返す"""
+        with torch.inference_mode():
+            preds = self._backend(im)
+            preds = ops.non_max_suppression(
+                preds,
+                conf,
+                self.iou_threshold,
+                classes=classes,
+                max_det=self.MAX_DET
+            )
+
+        # GPU→CPU転送はバッチ全体で1回だけ行う
+        counts = [len(pred) for pred in preds]
+        merged = torch.cat(preds).cpu().numpy()
+        return merged, counts
+
+    def _build_detections(
+        self,
+        sizes: Sequence[Tuple[int, int]],
+        plan: List[Tuple[float, int, int]],
+        offsets: List[Tuple[int, int]],
+        merged: np.ndarray,
+        counts: List[int]
+    ) -> List[Detections]:
+        """letterbox座標の検出行を元のフレームの正規化座標に戻してDetectionsにする"""
+        detections = []
+        start = 0
+        for (height, width), (ratio, _, _), (left, top), count in zip(
+            sizes, plan, offsets, counts, strict=True
+        ):
+            rows = merged[start:start + count]
+            start += count
+            xyxy = rows[:, :4] - np.array([left, top, left, top], dtype=rows.dtype)
+            xyxy /= ratio
+            np.clip(xyxy[:, 0::2], 0, width, out=xyxy[:, 0::2])
+            np.clip(xyxy[:, 1::2], 0, height, out=xyxy[:, 1::2])
+            detections.append(Detections(
+                bbox=normalize_boxes(xyxy, width, height, np.empty(xyxy.shape, dtype=np.float64)),
+                confidence=rows[:, 4].astype(np.float32),
+                class_id=rows[:, 5].astype(np.int32),
+                names=self.model.names
+            ))
         return detections
 
-    def detect_players(self, frame: np.ndarray) -> List[Detection]:
+    def _get_input_buffers(
+        self,
+        batch: int,
+        height: int,
+        width: int
+    ) -> Tuple[torch.Tensor, torch.Tensor]:
+        """(batch, height, width, 3) のホスト/デバイス入力バッファを返す (必要時のみ再確保)"""
+        size = batch * height * width * 3
+        if self._host_buffer is None or self._host_buffer.numel() < size:
+            if self._backend.device.type == "cpu":
+                # CPUではホストバッファをそのままモデル入力にする
+                self._host_buffer = torch.empty(size, dtype=torch.uint8)
+                self._device_buffer = self._host_buffer
+            else:
+                pin = self._backend.device.type == "cuda"
+                self._host_buffer = torch.empty(size, dtype=torch.uint8, pin_memory=pin)
+                self._device_buffer = torch.empty(size, dtype=torch.uint8, device=self._backend.device)
+        shape = (batch, height, width, 3)
+        return self._host_buffer[:size].view(shape), self._device_buffer[:size].view(shape)
+
+    def _convert_result(self, result, width: int, height: int) -> Detections:
+        """YOLOの推論結果1フレーム分をDetectionsに変換"""
+        boxes = result.boxes
+        if len(boxes) == 0:
+            return Detections.empty(self.model.names)
+
+        # GPU→CPU転送はボックスごとではなく配列単位で1回ずつ行う
+        xyxy = boxes.xyxy.cpu().numpy()
+        confidences = boxes.conf.cpu().numpy()
+        class_ids = boxes.cls.cpu().numpy().astype(np.int32)
+
+        xywh = normalize_boxes(xyxy, width, height, np.empty(xyxy.shape, dtype=np.float64))
+
+        return Detections(
+            bbox=xywh,
+            confidence=confidences,
+            class_id=class_ids,
+            names=self.model.names
+        )
+
+    def detect_players(self, frame: np.ndarray) -> Detections:
         """選手のみを検出"""
         return self.detect(frame, detect_players=True, detect_ball=False)
 
-    def detect_ball(self, frame: np.ndarray) -> List[Detection]:
+    def detect_ball(self, frame: np.ndarray) -> Detections:
         """ボールのみを検出"""
         return self.detect(frame, detect_players=False, detect_ball=True)
 
+    def warmup(self, iterations: int = 3, batch_size: int = 1):
+        """
+        ダミーフレームで推論を実行し、初回リクエストの遅延 (CUDAコンテキスト初期化、
+        cuDNNのアルゴリズム選択、入力バッファの確保など) を起動時に済ませる
+
+        Args:
+            iterations: 1フレームでの推論回数
+            batch_size: 追加で1回実行するバッチ推論のサイズ (2以上の場合)
+        """
+        dummy = np.zeros((self.IMGSZ, self.IMGSZ, 3), dtype=np.uint8)
+        for _ in range(iterations):
+            self.detect_batch([dummy])
+        if batch_size > 1:
+            # 最大バッチサイズ分の入力バッファ・TensorRTのプロファイルを用意する
+            self.detect_batch([dummy] * batch_size)
+
     def filter_by_class(
         self,
         detections: List[Detection],
@@ -180,10 +588,89 @@ class PlayerBallDetector:
         return max(ball_detections, key=lambda d: d.confidence)
 
 
+# 推論精度 (int8はエクスポートしたモデルでのみ使用できる)
+PRECISIONS = ("fp32", "fp16", "int8")
+
+# エクスポート形式ごとの成果物名のサフィックス (重みファイルと同じディレクトリに保存される)
+EXPORT_ARTIFACT_SUFFIXES = {
+    "onnx": ".onnx",
+    "engine": ".engine",  # TensorRT
+    "openvino": "_openvino_model",
+}
+
+
+def export_model(
+    model_path: str,
+    export_format: str,
+    half: bool = False,
+    int8: bool = False,
+    batch: int = 1,
+    imgsz: int = 640,
+    device: str = "cpu"
+) -> str:
+    """
+    YOLOモデルを推論用フォーマット (ONNX / TensorRT / OpenVINO) にエクスポート
+
+    成果物は重みファイルの隣に、精度とバッチサイズを含む名前 (yolov8n_fp16_b8.engine 等) で
+    保存する。同じ設定の成果物が既に存在する場合はエクスポートをスキップするため、
+    精度やバッチサイズを変えると別の成果物としてエクスポートし直す。
+
+    Args:
+        model_path: PyTorch重みファイルパス (yolov8n.pt, etc.)
+        export_format: エクスポート形式 ("onnx", "engine", "openvino")
+        half: FP16でエクスポートするか
+        int8: INT8でエクスポートするか
+        batch: 最大バッチサイズ (動的バッチの上限)
+        imgsz: 入力画像サイズ
+        device: エクスポートに使用するデバイス (TensorRTはCUDAが必要)
+
+    Returns:
+        エクスポートされたモデルのパス
+    """
+    if export_format not in EXPORT_ARTIFACT_SUFFIXES:
+        raise ValueError(
+            f"Unsupported export format: {export_format} "
+            f"(expected one of {list(EXPORT_ARTIFACT_SUFFIXES)})"
+        )
+
+    weights = Path(model_path)
+    artifact = weights.with_name(
+        f"{weights.stem}_{export_precision(half, int8)}_b{batch}{EXPORT_ARTIFACT_SUFFIXES[export_format]}"
+    )
+    if artifact.exists():
+        return str(artifact)
+
+    model = YOLO(model_path, task="detect")
+    exported = model.export(
+        format=export_format,
+        half=half,
+        int8=int8,
+        dynamic=True,
+        batch=batch,
+        imgsz=imgsz,
+        device=device
+    )
+    # Ultralyticsは設定によらず同じ名前 (yolov8n.engine 等) に書き出すため、設定ごとの名前に移す
+    os.replace(exported, artifact)
+    return str(artifact)
+
+
+def export_precision(half: bool, int8: bool) -> str:
+    """エクスポートする成果物の精度 ("int8", "fp16", "fp32")"""
+    if int8:
+        return "int8"
+    return "fp16" if half else "fp32"
+
+
 def create_detector(
     model_size: str = "n",
     conf_threshold: float = 0.3,
-    device: str = "cpu"
+    device: str = "cpu",
+    export_format: Optional[str] = None,
+    half: bool = False,
+    int8: bool = False,
+    batch: int = 1,
+    precision: str = "fp32"
 ) -> PlayerBallDetector:
     """
     便利な検出器作成関数
@@ -192,15 +679,52 @@ def create_detector(
         model_size: モデルサイズ ("n", "s", "m", "l", "x")
         conf_threshold: 信頼度閾値
         device: 使用デバイス
+        export_format: 推論用にエクスポートする形式 ("onnx", "engine", "openvino")
+            Noneの場合はPyTorchの重みをそのまま使用
+        half: FP16でエクスポートするか (エクスポートしたモデルはFP16で推論する)
+        int8: INT8でエクスポートするか
+        batch: エクスポート時の最大バッチサイズ
+        precision: 推論精度 ("fp32", "fp16", "int8")
+            fp16はCUDA/MPSでモデルと入力をFP16にする。int8はエクスポートが必要なため、
+            export_format未指定の場合はCUDAではTensorRT、それ以外ではOpenVINOにエクスポートする
 
     Returns:
         PlayerBallDetectorインスタンス
     """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unsupported precision: {precision} (expected one of {list(PRECISIONS)})")
+
+    if precision == "fp16":
+        half = True
+    elif precision == "int8":
+        int8 = True
+        if not export_format:
+            export_format = "engine" if device.startswith("cuda") else "openvino"
+
     model_path = f"yolov8{model_size}.pt"
+    exported = False
+    if export_format:
+        try:
+            model_path = export_model(
+                model_path,
+                export_format,
+                half=half,
+                int8=int8,
+                batch=batch,
+                device=device
+            )
+            exported = True
+        except Exception as e:
+            # エクスポートできない環境ではPyTorchの重みで継続
+            print(f"Model export to {export_format} failed, using PyTorch weights: {e}")
+
+    # 推論時の精度は実際に使うモデルに合わせる (FP16でエクスポートしたモデルにはFP16の入力が必要)。
+    # エクスポートに失敗してPyTorchの重みを使う場合、halfはprecision="fp16"のときのみ有効にする
     return PlayerBallDetector(
         model_path=model_path,
         conf_threshold=conf_threshold,
-        device=device
+        device=device,
+        half=precision == "fp16" or (half and exported)
     )
 
 
@@ -0,0 +1,264 @@
+"""
+推論ワーカープロセス
+
+YOLOモデルを専用の子プロセスで保持し、APIプロセスのスレッドとGIL・PyTorchの
+スレッドプールを奪い合わないようにする。フレームは起動時に確保した共有メモリの
+スロット経由で受け渡し、キューには (スロット番号, 形状) のみを流すため、
+大きなuint8配列をpickleしない。
+"""
+
+import asyncio
+import itertools
+import multiprocessing as mp
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+# 1スロットあたりのデフォルトサイズ (1920x1080 BGR)
+DEFAULT_SLOT_BYTES = 1920 * 1080 * 3
+
+
+def _worker_main(
+    detector_kwargs: Dict[str, Any],
+    slot_names: List[str],
+    request_queue: mp.Queue,
+    response_queue: mp.Queue
+):
+    """子プロセスのエントリポイント: 検出器をロードしてリクエストを処理し続ける"""
+    # スレッド数の環境変数は親プロセスから引き継がれる
+    from thread_config import configure_thread_env, configure_thread_pools
+    configure_thread_pools(configure_thread_env())
+
+    from detector import create_detector
+
+    slots = [shared_memory.SharedMemory(name=name) for name in slot_names]
+    try:
+        detector = create_detector(**detector_kwargs)
+        detector.warmup(batch_size=detector_kwargs.get("batch", 1))
+    except Exception as e:
+        response_queue.put((None, None, f"Failed to create detector: {e}"))
+        return
+    response_queue.put((None, None, None))  # 起動完了の通知
+
+    try:
+        while True:
+            message = request_queue.get()
+            if message is None:
+                break
+
+            request_id, frames_meta, params = message
+            try:
+                frames = [
+                    # スロットに収まらなかったフレームは配列がそのまま送られてくる
+                    np.ndarray(shape, dtype=np.uint8, buffer=slots[slot].buf)
+                    if slot is not None else frame
+                    for slot, shape, frame in frames_meta
+                ]
+                results = detector.detect_batch(frames, **params)
+                response_queue.put((request_id, results, None))
+            except Exception as e:
+                response_queue.put((request_id, None, str(e)))
+            finally:
+                frames = None
+    finally:
+        for shm in slots:
+            try:
+                shm.close()
+            except BufferError:
+                # 推論ライブラリがフレームへの参照を保持している場合は解放をプロセス終了に任せる
+                pass
+
+
+class InferenceWorker:
+    """推論ワーカープロセスのクライアント (APIプロセス側)"""
+
+    def __init__(
+        self,
+        detector_kwargs: Dict[str, Any],
+        num_slots: int = 8,
+        slot_bytes: int = DEFAULT_SLOT_BYTES
+    ):
+        """
+        Args:
+            detector_kwargs: 子プロセスで create_detector() に渡す引数
+            num_slots: 共有メモリのフレームスロット数 (最大バッチサイズ以上にする)
+            slot_bytes: 1スロットのバイト数 (これを超えるフレームはキュー経由で送る)
+        """
+        self.detector_kwargs = detector_kwargs
+        self.num_slots = num_slots
+        self.slot_bytes = slot_bytes
+
+        self._ctx = mp.get_context("spawn")
+        self._slots: List[shared_memory.SharedMemory] = []
+        self._process: Optional[mp.Process] = None
+        self._request_queue: Optional[mp.Queue] = None
+        self._response_queue: Optional[mp.Queue] = None
+        self._reader: Optional[threading.Thread] = None
+        self._free_slots: Optional[asyncio.Queue] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._request_slots: Dict[int, List[int]] = {}
+        self._request_ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopping = False
+
+    def start(self, timeout: float = 300.0):
+        """
+        共有メモリを確保してワーカープロセスを起動し、モデルのロード完了を待つ
+
+        イベントループ上で呼び出すこと (結果の受け渡しにそのループを使用する)。
+
+        Raises:
+            RuntimeError: ワーカーの起動に失敗した場合
+        """
+        self._loop = asyncio.get_running_loop()
+        self._slots = [
+            shared_memory.SharedMemory(create=True, size=self.slot_bytes)
+            for _ in range(self.num_slots)
+        ]
+        self._free_slots = asyncio.Queue()
+        for slot in range(self.num_slots):
+            self._free_slots.put_nowait(slot)
+
+        self._request_queue = self._ctx.Queue()
+        self._response_queue = self._ctx.Queue()
+        self._process = self._ctx.Process(
+            target=_worker_main,
+            args=(
+                self.detector_kwargs,
+                [shm.name for shm in self._slots],
+                self._request_queue,
+                self._response_queue
+            ),
+            daemon=True
+        )
+        self._process.start()
+
+        error = self._wait_ready(timeout)
+        if error is not None:
+            self.stop()
+            raise RuntimeError(f"Inference worker failed to start: {error}")
+
+        self._reader = threading.Thread(target=self._read_responses, daemon=True)
+        self._reader.start()
+
+    def _wait_ready(self, timeout: float) -> Optional[str]:
+        """ワーカーの起動完了通知を待ち、失敗時はエラーメッセージを返す"""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                _, _, error = self._response_queue.get(timeout=1.0)
+                return error
+            except queue.Empty:
+                if not self._process.is_alive():
+                    return f"worker exited with code {self._process.exitcode}"
+        return f"worker did not become ready within {timeout}s"
+
+    def stop(self):
+        """ワーカープロセスを終了し、共有メモリを解放"""
+        self._stopping = True
+        if self._process is not None:
+            if self._process.is_alive():
+                self._request_queue.put(None)
+                self._process.join(timeout=10)
+            if self._process.is_alive():
+                self._process.terminate()
+            self._process = None
+
+        if self._reader is not None:
+            self._reader.join(timeout=2)
+            self._reader = None
+
+        self._fail_pending(RuntimeError("Inference worker stopped"))
+
+        for shm in self._slots:
+            shm.close()
+            shm.unlink()
+        self._slots = []
+
+    async def detect_batch(self, frames: List[np.ndarray], params: Dict[str, Any]) -> List[Any]:
+        """
+        フレームを共有メモリに書き込み、ワーカーでバッチ推論を実行
+
+        Args:
+            frames: 入力フレームのリスト (uint8, BGR)
+            params: detector.detect_batch() に渡すキーワード引数
+
+        Returns:
+            フレームごとの検出結果
+        """
+        if self._process is None or not self._process.is_alive():
+            raise RuntimeError("Inference worker is not running")
+
+        acquired: List[int] = []
+        frames_meta = []
+        try:
+            for frame in frames:
+                frame = np.ascontiguousarray(frame, dtype=np.uint8)
+                if frame.nbytes > self.slot_bytes:
+                    frames_meta.append((None, frame.shape, frame))
+                    continue
+
+                slot = await self._free_slots.get()
+                acquired.append(slot)
+                view = np.ndarray(frame.shape, dtype=np.uint8, buffer=self._slots[slot].buf)
+                view[:] = frame
+                frames_meta.append((slot, frame.shape, None))
+
+            request_id = next(self._request_ids)
+            future = self._loop.create_future()
+            self._pending[request_id] = future
+            self._request_queue.put((request_id, frames_meta, params))
+            # 送信後のスロットはワーカーの応答を受け取るまで解放しない
+            # (待機がキャンセルされても、ワーカーはまだスロットを読んでいる可能性がある)
+            self._request_slots[request_id], acquired = acquired, []
+        finally:
+            for slot in acquired:
+                self._free_slots.put_nowait(slot)
+        return await future
+
+    def _read_responses(self):
+        """レスポンスキューを読み、対応するFutureを解決する (専用スレッド)"""
+        while not self._stopping:
+            try:
+                request_id, results, error = self._response_queue.get(timeout=1.0)
+            except queue.Empty:
+                if self._process is not None and not self._process.is_alive():
+                    self._loop.call_soon_threadsafe(
+                        self._fail_pending, RuntimeError("Inference worker exited unexpectedly")
+                    )
+                    return
+                continue
+            except (EOFError, OSError):
+                return
+
+            self._loop.call_soon_threadsafe(self._resolve, request_id, results, error)
+
+    def _resolve(self, request_id: int, results: Any, error: Optional[str]):
+        """イベントループ上でFutureに結果を設定"""
+        self._release_slots(request_id)
+        future = self._pending.pop(request_id, None)
+        if future is None or future.done():
+            return
+        if error is not None:
+            future.set_exception(RuntimeError(error))
+        else:
+            future.set_result(results)
+
+    def _fail_pending(self, error: Exception):
+        """待機中のすべてのリクエストを失敗させる"""
+        pending, self._pending = self._pending, {}
+        for request_id, future in pending.items():
+            # ワーカーは終了しているため、応答を待たずにスロットを解放してよい
+            self._release_slots(request_id)
+            if not future.done():
+                future.set_exception(error)
+
+    def _release_slots(self, request_id: int):
+        """リクエストが使用していた共有メモリのスロットを空きに戻す"""
+        for slot in self._request_slots.pop(request_id, []):
+            self._free_slots.put_nowait(slot)
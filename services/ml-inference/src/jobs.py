@@ -0,0 +1,70 @@
+"""
+トラッキングジョブの状態管理
+
+ジョブはBackgroundTasks (スレッドプール) から更新され、ステータス取得の
+エンドポイントから並行して読まれるため、ロックで保護した辞書で保持する。
+完了・失敗から一定時間経過したジョブは破棄し、メモリ使用量を抑える。
+
+ジョブの状態はプロセスごとに保持されるため、uvicornを複数ワーカーで起動する場合は
+外部ストア (Redis等) が必要になる。
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+# 終了状態のジョブのステータス
+FINISHED_STATUSES = ("completed", "error")
+
+
+class JobStore:
+    """スレッドセーフなジョブ状態ストア (TTL付き)"""
+
+    def __init__(self, ttl_seconds: float = 3600.0):
+        """
+        Args:
+            ttl_seconds: 終了したジョブを保持する秒数
+        """
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Dict[str, Any]] = {}
+        self._finished_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def create(self, job_id: str, **fields: Any):
+        """ジョブを登録"""
+        with self._lock:
+            self._evict_expired()
+            self._jobs[job_id] = dict(fields)
+            self._finished_at.pop(job_id, None)
+
+    def update(self, job_id: str, **fields: Any):
+        """ジョブの状態を更新 (破棄済みのジョブは無視する)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            job.update(fields)
+            if job.get("status") in FINISHED_STATUSES:
+                self._finished_at.setdefault(job_id, time.monotonic())
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """ジョブの状態のコピーを取得 (存在しない場合はNone)"""
+        with self._lock:
+            self._evict_expired()
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def _evict_expired(self):
+        """TTLを過ぎた終了済みジョブを破棄 (ロック取得済みで呼び出すこと)"""
+        if not self._finished_at:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        expired = [job_id for job_id, finished in self._finished_at.items() if finished < cutoff]
+        for job_id in expired:
+            del self._finished_at[job_id]
+            self._jobs.pop(job_id, None)
@@ -6,17 +6,29 @@
 出力: JSON形式のトラッキング結果
 """
 
-import json
+import functools
 import os
-from dataclasses import dataclass, asdict
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Callable
+from typing import Any, Callable, Dict, List, Optional, Sequence
 import cv2
 import numpy as np
+import orjson
 from tqdm import tqdm
 
 from detector import PlayerBallDetector, create_detector
 from tracker import MultiClassTracker, TrackedDetection, create_tracker
+from video_decoder import (
+    DEFAULT_CHUNK_SIZE,
+    FrameRingBuffer,
+    NvdecVideoReader,
+    ParallelVideoDecoder,
+    frame_to_bgr,
+    probe_frame_shape
+)
 
 
 @dataclass
@@ -36,22 +48,108 @@ class PipelineConfig:
     # フレーム処理設定
     skip_frames: int = 0  # 0 = すべてのフレームを処理
     max_frames: Optional[int] = None  # None = すべてのフレームを処理
+    batch_size: int = 8  # 1回の推論でまとめて検出するフレーム数
+    queue_size: int = 8  # デコード/エンコードスレッドとの間のキューの最大長
+    # 2以上の場合は複数プロセスで並列デコード (オフライン処理向け)。ワーカーはspawnで起動するため、
+    # 呼び出し元のスクリプトでは処理を if __name__ == "__main__": の中で実行すること
+    decode_workers: int = 1
+    decode_chunk_size: int = DEFAULT_CHUNK_SIZE  # 並列デコード時に各プロセスへ割り当てるフレーム数
+    decode_backend: str = "cv2"  # "cv2", "nvdec" (torchcodecでGPU上にデコード、CUDAデバイス時のみ)
+    export_format: Optional[str] = None  # "onnx", "engine", "openvino" (None = PyTorchの重みを使用)
+    precision: str = "fp32"  # "fp32", "fp16" (CUDA/MPS), "int8" (エクスポートしたモデルを使用)
 
     # 出力設定
-    output_format: str = "json"  # "json"
+    output_format: str = "json"  # "json", "parquet" (pyarrowが必要)
     save_annotated_video: bool = False
     annotated_video_path: Optional[str] = None
 
 
-@dataclass
+@dataclass(slots=True, eq=False)
 class TrackData:
-    """トラック情報"""
+    """
+    トラック情報 (Structure of Arrays)
+
+    フレームごとのdictを保持せず、列ごとのNumPy配列で保持する。
+    JSON出力用の従来形式は frames プロパティで取得できる。
+    """
 
     trackId: str
-    frames: List[Dict]  # TrackFrameのdict表現
+    frameNumber: np.ndarray  # (N,) int32
+    timestamp: np.ndarray  # (N,) seconds
+    bbox: np.ndarray  # (N, 4) (x, y, w, h) normalized 0-1
+    center: np.ndarray  # (N, 2) (x, y) normalized 0-1
+    confidence: np.ndarray  # (N,)
+
+    @classmethod
+    def from_columns(cls, trackId: str, columns: Dict[str, list]) -> "TrackData":
+        """列ごとのリストから作成"""
+        return cls(
+            trackId=trackId,
+            frameNumber=np.asarray(columns["frameNumber"], dtype=np.int32),
+            timestamp=np.asarray(columns["timestamp"], dtype=np.float64),
+            bbox=np.asarray(columns["bbox"], dtype=np.float64).reshape(-1, 4),
+            center=np.asarray(columns["center"], dtype=np.float64).reshape(-1, 2),
+            confidence=np.asarray(columns["confidence"], dtype=np.float32)
+        )
 
+    @classmethod
+    def from_frames(cls, trackId: str, frames: List[Dict]) -> "TrackData":
+        """TrackFrameのdict表現のリストから作成"""
+        return cls.from_columns(trackId, {
+            "frameNumber": [f["frameNumber"] for f in frames],
+            "timestamp": [f["timestamp"] for f in frames],
+            "bbox": [(f["bbox"]["x"], f["bbox"]["y"], f["bbox"]["w"], f["bbox"]["h"]) for f in frames],
+            "center": [(f["center"]["x"], f["center"]["y"]) for f in frames],
+            "confidence": [f["confidence"] for f in frames]
+        })
+
+    def __len__(self) -> int:
+        return len(self.frameNumber)
+
+    def __eq__(self, other: object) -> bool:
+        # 列がNumPy配列のため、dataclassの既定の比較ではなく配列ごとに比較する
+        if not isinstance(other, TrackData):
+            return NotImplemented
+        return self.trackId == other.trackId and all(
+            np.array_equal(getattr(self, name), getattr(other, name))
+            for name in ("frameNumber", "timestamp", "bbox", "center", "confidence")
+        )
 
-@dataclass
+    @property
+    def frames(self) -> List[Dict]:
+        """TrackFrameのdict表現のリスト"""
+        return _frame_dicts(
+            self.frameNumber.tolist(),
+            self.timestamp.tolist(),
+            self.bbox.tolist(),
+            self.center.tolist(),
+            self.confidence.tolist()
+        )
+
+
+def _frame_dicts(
+    frame_numbers: list,
+    timestamps: list,
+    bboxes: list,
+    centers: list,
+    confidences: list
+) -> List[Dict]:
+    """列ごとの値のリストからTrackFrameのdict表現のリストを作成"""
+    return [
+        {
+            "frameNumber": frame_number,
+            "timestamp": timestamp,
+            "bbox": {"x": x, "y": y, "w": w, "h": h},
+            "center": {"x": cx, "y": cy},
+            "confidence": confidence
+        }
+        for frame_number, timestamp, (x, y, w, h), (cx, cy), confidence in zip(
+            frame_numbers, timestamps, bboxes, centers, confidences, strict=True
+        )
+    ]
+
+
+@dataclass(slots=True, frozen=True)
 class BallData:
     """ボール検出情報"""
 
@@ -64,15 +162,116 @@ class BallData:
 
 @dataclass
 class PipelineResult:
-    """パイプライン実行結果"""
+    """
+    パイプライン実行結果
+
+    処理中に集約したトラックごとの列リスト (trackId -> 列名 -> 値のリスト) を
+    track_columns にそのまま保持し、tracks は初めてアクセスしたときに生成する。
+    保存時は track_dicts() で列リストから直接JSON用のdictを作る。
+    """
+
+    tracks: List[TrackData] = field(default_factory=list)
+    ball: List[BallData] = field(default_factory=list)
+    metadata: Dict = field(default_factory=dict)
+    track_columns: Dict[str, Dict[str, list]] = field(
+        default_factory=dict, repr=False, compare=False
+    )
+
+    def __post_init__(self):
+        # track_columnsだけが渡された場合は tracks を未設定にしておき、__getattr__ で生成する
+        if self.track_columns and not self.tracks:
+            del self.tracks
+
+    def __getattr__(self, name: str):
+        # インスタンスに属性がない場合のみ呼ばれる (tracks は列リストから生成してキャッシュ)
+        if name != "tracks":
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        self.tracks = [
+            TrackData.from_columns(track_id, columns)
+            for track_id, columns in self.track_columns.items()
+        ]
+        return self.tracks
+
+    def track_dicts(self) -> List[Dict]:
+        """JSON出力用のトラックのdict表現 ({"trackId": ..., "frames": [...]} のリスト)"""
+        if "tracks" in vars(self):
+            return [{"trackId": track.trackId, "frames": track.frames} for track in self.tracks]
+
+        # TrackData (NumPy配列) を経由せず、列リストから直接作る
+        return [
+            {
+                "trackId": track_id,
+                "frames": _frame_dicts(
+                    columns["frameNumber"],
+                    columns["timestamp"],
+                    columns["bbox"],
+                    columns["center"],
+                    columns["confidence"]
+                )
+            }
+            for track_id, columns in self.track_columns.items()
+        ]
+
+
+@functools.lru_cache(maxsize=4)
+def _get_detector(
+    model_size: str,
+    conf_threshold: float,
+    device: str,
+    export_format: Optional[str],
+    batch: int,
+    precision: str
+) -> PlayerBallDetector:
+    """
+    設定ごとに検出器を1度だけ生成して使い回す
+
+    動画ごとにTrackingPipelineを作り直してもモデルのロードやエクスポートを
+    繰り返さない。検出器は読み取り専用の設定と内部ロックを持ち、複数の
+    パイプラインから共有できる。
+    """
+    return create_detector(
+        model_size=model_size,
+        conf_threshold=conf_threshold,
+        device=device,
+        export_format=export_format,
+        batch=batch,
+        precision=precision
+    )
+
+
+# キューの待機を中断するか確認する間隔 (秒)
+_QUEUE_POLL_INTERVAL = 0.1
 
-    tracks: List[TrackData]
-    ball: List[BallData]
-    metadata: Dict
+
+def _put(q: queue.Queue, item: Any, stop_event: threading.Event) -> bool:
+    """停止要求があるまでキューへの投入を試みる (投入できたらTrue)"""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=_QUEUE_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: queue.Queue, stop_event: threading.Event) -> Any:
+    """停止要求があるまでキューから取り出す (停止時はNone)"""
+    while not stop_event.is_set():
+        try:
+            return q.get(timeout=_QUEUE_POLL_INTERVAL)
+        except queue.Empty:
+            continue
+    return None
 
 
 class TrackingPipeline:
-    """動画処理パイプライン"""
+    """
+    動画処理パイプライン
+
+    デコード・検出/トラッキング・エンコード (アノテーション動画の書き出し) を
+    それぞれ別スレッドで実行し、長さ制限付きのキューでつなぐ。cv2のデコード・
+    エンコードはGILを解放するため、検出と並行して進む。
+    """
 
     def __init__(self, config: Optional[PipelineConfig] = None):
         """
@@ -82,10 +281,15 @@ class TrackingPipeline:
         self.config = config or PipelineConfig()
 
         # 検出器とトラッカーを初期化
-        self.detector = create_detector(
-            model_size=self.config.model_size,
-            conf_threshold=self.config.conf_threshold,
-            device=self.config.device
+        # 同じ設定の検出器はパイプライン間で共有する
+        self.detector = _get_detector(
+            self.config.model_size,
+            self.config.conf_threshold,
+            self.config.device,
+            self.config.export_format,
+            # バッチサイズはエクスポート時の動的バッチ上限にのみ使う
+            self.config.batch_size if self.config.export_format or self.config.precision == "int8" else 1,
+            self.config.precision
         )
 
         self.tracker = create_tracker(
@@ -93,6 +297,10 @@ class TrackingPipeline:
             multi_class=True
         )
 
+        # 結果の保存 (シリアライズ・書き込み) は別スレッドで行い、次の動画の処理と重ねる
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline-io")
+        self._pending_writes: List[Future] = []
+
     def process_video(
         self,
         video_path: str,
@@ -127,7 +335,7 @@ class TrackingPipeline:
         self.tracker.reset()
 
         # 結果を格納する辞書
-        tracks_dict: Dict[str, List[Dict]] = {}  # track_id -> frames
+        tracks_dict: Dict[str, Dict[str, list]] = {}  # track_id -> 列名 -> 値のリスト
         ball_detections: List[BallData] = []
 
         # アノテーション付き動画の準備
@@ -143,98 +351,110 @@ class TrackingPipeline:
                 (width, height)
             )
 
-        # フレームごとに処理
-        frame_number = 0
-        processed_frames = 0
+        # デコード・エンコードをそれぞれ別スレッドで実行
+        stop_event = threading.Event()
+        worker_errors: List[BaseException] = []
+        frame_queue: queue.Queue = queue.Queue(maxsize=self.config.queue_size)
+
+        # NVDECデコード (フレームはGPU上に置いたまま検出器へ渡す)
+        nvdec_reader = None
+        if self.config.decode_backend == "nvdec":
+            nvdec_reader = self._open_nvdec(video_path)
+
+        # cv2でのデコード時はフレーム配列を使い回す (並列デコード時は共有メモリからコピーする)
+        # (スロット数はデコードキュー・バッチ・エンコードキューで同時に使用中になりうる枚数)
+        # (形状は自動回転後のサイズになるよう、CAP_PROPではなく実際にデコードしたフレームから求める)
+        ring = None
+        if nvdec_reader is None:
+            ring = FrameRingBuffer(
+                self.config.queue_size * 2 + self.config.batch_size + 2,
+                probe_frame_shape(video_path)
+            )
 
-        pbar = tqdm(total=total_frames, desc="Processing video")
+        decoder = threading.Thread(
+            target=self._decode_worker,
+            args=(
+                cap, video_path, total_frames, frame_queue, stop_event, worker_errors,
+                ring, nvdec_reader
+            ),
+            daemon=True
+        )
+        encode_queue: Optional[queue.Queue] = None
+        encoder = None
+        if video_writer:
+            encode_queue = queue.Queue(maxsize=self.config.queue_size)
+            encoder = threading.Thread(
+                target=self._encode_worker,
+                args=(video_writer, encode_queue, stop_event, worker_errors, ring),
+                daemon=True
+            )
+            encoder.start()
+        decoder.start()
 
-        while cap.isOpened() and processed_frames < total_frames:
-            ret, frame = cap.read()
-            if not ret:
-                break
+        processed_frames = 0
 
-            # フレームスキップ
-            if self.config.skip_frames > 0 and frame_number % (self.config.skip_frames + 1) != 0:
-                frame_number += 1
-                continue
-
-            # 検出
-            detections = self.detector.detect(frame)
-
-            # トラッキング
-            tracked_result = self.tracker.update(detections, frame_number)
-
-            # 選手トラックを集約
-            for tracked_det in tracked_result["players"]:
-                track_id = tracked_det.track_id
-                if track_id not in tracks_dict:
-                    tracks_dict[track_id] = []
-
-                frame_data = {
-                    "frameNumber": tracked_det.frame_number,
-                    "timestamp": tracked_det.timestamp,
-                    "bbox": {
-                        "x": tracked_det.bbox[0],
-                        "y": tracked_det.bbox[1],
-                        "w": tracked_det.bbox[2],
-                        "h": tracked_det.bbox[3]
-                    },
-                    "center": {
-                        "x": tracked_det.center[0],
-                        "y": tracked_det.center[1]
-                    },
-                    "confidence": tracked_det.confidence
-                }
-                tracks_dict[track_id].append(frame_data)
-
-            # ボール検出を記録
-            for tracked_ball in tracked_result["ball"]:
-                ball_data = BallData(
-                    frameNumber=tracked_ball.frame_number,
-                    timestamp=tracked_ball.timestamp,
-                    position={
-                        "x": tracked_ball.center[0],
-                        "y": tracked_ball.center[1]
-                    },
-                    confidence=tracked_ball.confidence,
-                    visible=True
-                )
-                ball_detections.append(ball_data)
+        pbar = tqdm(total=total_frames, desc="Processing video")
 
-            # アノテーション
+        try:
+            finished = False
+            while not finished:
+                # batch_size枚 (または終端まで) のフレームを集める
+                batch = []
+                while len(batch) < self.config.batch_size:
+                    item = _get(frame_queue, stop_event)
+                    if item is None:
+                        finished = True
+                        break
+                    batch.append(item)
+                if not batch:
+                    break
+
+                # 検出 (バッチ内のフレームをまとめて1回で推論)
+                batch_detections = self.detector.detect_batch([frame for _, frame in batch])
+
+                # トラッキングは時系列の状態を持つため、フレーム順に1枚ずつ行う
+                for (frame_number, frame), detections in zip(batch, batch_detections, strict=True):
+                    tracked_result = self.tracker.update(detections, frame_number)
+                    self._record_tracks(tracked_result, tracks_dict, ball_detections)
+
+                    # アノテーションと書き出しはエンコードスレッドで行う
+                    if encode_queue is not None:
+                        if not _put(encode_queue, (frame, tracked_result), stop_event):
+                            finished = True
+                            break
+                    elif ring is not None:
+                        ring.release()
+
+                    # 進捗更新
+                    processed_frames += 1
+                    pbar.update(1)
+
+                    if progress_callback:
+                        progress_callback(processed_frames, total_frames)
+        finally:
+            if encode_queue is not None and not stop_event.is_set():
+                # 残りのフレームを書き出してから終了させる
+                _put(encode_queue, None, stop_event)
+                encoder.join()
+            stop_event.set()
+            decoder.join()
+            if encoder is not None:
+                encoder.join()
+
+            pbar.close()
+            cap.release()
             if video_writer:
-                annotated_frame = self._annotate_frame(
-                    frame,
-                    tracked_result["players"],
-                    tracked_result["ball"]
-                )
-                video_writer.write(annotated_frame)
-
-            # 進捗更新
-            frame_number += 1
-            processed_frames += 1
-            pbar.update(1)
+                video_writer.release()
 
-            if progress_callback:
-                progress_callback(processed_frames, total_frames)
+        if worker_errors:
+            raise worker_errors[0]
 
-        pbar.close()
-        cap.release()
-        if video_writer:
-            video_writer.release()
-
-        # トラックデータを構築
-        tracks = []
-        for track_id, frames in tracks_dict.items():
-            if not frames:
-                continue
-
-            track_data = TrackData(
-                trackId=track_id,
-                frames=frames
-            )
-            tracks.append(track_data)
+        # トラックデータは列リストのまま渡す (TrackDataは必要になったときに生成される)
+        track_columns = {
+            track_id: columns
+            for track_id, columns in tracks_dict.items()
+            if columns["frameNumber"]
+        }
 
         # メタデータ
         metadata = {
@@ -246,94 +466,294 @@ class TrackingPipeline:
             "height": height,
             "modelSize": self.config.model_size,
             "confThreshold": self.config.conf_threshold,
-            "tracksCount": len(tracks),
+            "tracksCount": len(track_columns),
             "ballDetectionsCount": len(ball_detections)
         }
 
         return PipelineResult(
-            tracks=tracks,
             ball=ball_detections,
-            metadata=metadata
+            metadata=metadata,
+            track_columns=track_columns
         )
 
+    def _record_tracks(
+        self,
+        tracked_result: Dict[str, List[TrackedDetection]],
+        tracks_dict: Dict[str, Dict[str, list]],
+        ball_detections: List[BallData]
+    ):
+        """1フレーム分のトラッキング結果を選手トラック・ボール検出に集約"""
+        # 選手トラックを集約
+        # (検出ごとにdictを作らず、トラックごとの列リストに値を追加する)
+        for tracked_det in tracked_result["players"]:
+            columns = tracks_dict.get(tracked_det.track_id)
+            if columns is None:
+                columns = tracks_dict[tracked_det.track_id] = {
+                    "frameNumber": [],
+                    "timestamp": [],
+                    "bbox": [],
+                    "center": [],
+                    "confidence": []
+                }
+
+            columns["frameNumber"].append(tracked_det.frame_number)
+            columns["timestamp"].append(tracked_det.timestamp)
+            columns["bbox"].append(tracked_det.bbox)
+            columns["center"].append(tracked_det.center)
+            columns["confidence"].append(tracked_det.confidence)
+
+        # ボール検出を記録
+        for tracked_ball in tracked_result["ball"]:
+            ball_data = BallData(
+                frameNumber=tracked_ball.frame_number,
+                timestamp=tracked_ball.timestamp,
+                position={
+                    "x": tracked_ball.center[0],
+                    "y": tracked_ball.center[1]
+                },
+                confidence=tracked_ball.confidence,
+                visible=True
+            )
+            ball_detections.append(ball_data)
+
+    def _open_nvdec(self, video_path: str) -> Optional[NvdecVideoReader]:
+        """NVDECリーダーを開く (利用できない場合はNoneを返してcv2でデコードする)"""
+        if not self.config.device.startswith("cuda"):
+            print("NVDEC decode requires a CUDA device, falling back to cv2")
+            return None
+        try:
+            return NvdecVideoReader(video_path, device=self.config.device)
+        except Exception as e:
+            print(f"NVDEC decode unavailable, falling back to cv2: {e}")
+            return None
+
+    def _decode_worker(
+        self,
+        cap: cv2.VideoCapture,
+        video_path: str,
+        total_frames: int,
+        frame_queue: queue.Queue,
+        stop_event: threading.Event,
+        errors: List[BaseException],
+        ring: Optional[FrameRingBuffer] = None,
+        nvdec_reader: Optional[NvdecVideoReader] = None
+    ):
+        """デコードスレッド: 処理対象のフレームを (frame_number, frame) としてキューに積む"""
+        try:
+            if nvdec_reader is not None:
+                frames = nvdec_reader.iter_frames(
+                    total_frames * (self.config.skip_frames + 1),
+                    skip_frames=self.config.skip_frames,
+                    window=self.config.batch_size
+                )
+                for item in frames:
+                    if not _put(frame_queue, item, stop_event):
+                        return
+                return
+
+            if self.config.decode_workers > 1:
+                # 処理対象 total_frames 枚を含むフレーム範囲を並列デコード
+                num_frames = min(
+                    total_frames * (self.config.skip_frames + 1),
+                    int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+                )
+                with ParallelVideoDecoder(
+                    video_path,
+                    num_frames,
+                    num_workers=self.config.decode_workers,
+                    chunk_size=self.config.decode_chunk_size,
+                    skip_frames=self.config.skip_frames
+                ) as parallel_decoder:
+                    def acquire() -> Optional[np.ndarray]:
+                        # 停止要求があればNoneを返してデコードを終了させる
+                        while not stop_event.is_set():
+                            slot = ring.acquire(timeout=_QUEUE_POLL_INTERVAL)
+                            if slot is not None:
+                                return slot
+                        return None
+
+                    for item in parallel_decoder.iter_into(acquire):
+                        if not _put(frame_queue, item, stop_event):
+                            return
+                return
+
+            skip = self.config.skip_frames
+            frame_number = 0
+            decoded_frames = 0
+            slot = None
+            while decoded_frames < total_frames and not stop_event.is_set():
+                # フレームスキップ (grab()で読み進めるだけで、デコード・コピーはしない)
+                if skip > 0 and frame_number % (skip + 1) != 0:
+                    if not cap.grab():
+                        break
+                    frame_number += 1
+                    continue
+
+                if ring is not None and slot is None:
+                    slot = ring.acquire(timeout=_QUEUE_POLL_INTERVAL)
+                    if slot is None:
+                        continue
+
+                # スロットがあればその配列に直接デコードする
+                ret, frame = cap.read(slot) if slot is not None else cap.read()
+                if not ret:
+                    break
+
+                if not _put(frame_queue, (frame_number, frame), stop_event):
+                    return
+                slot = None
+                frame_number += 1
+                decoded_frames += 1
+        except Exception as e:
+            errors.append(e)
+        finally:
+            # 終端を通知
+            _put(frame_queue, None, stop_event)
+
+    def _encode_worker(
+        self,
+        video_writer: cv2.VideoWriter,
+        encode_queue: queue.Queue,
+        stop_event: threading.Event,
+        errors: List[BaseException],
+        ring: Optional[FrameRingBuffer] = None
+    ):
+        """エンコードスレッド: トラッキング結果を描画して動画に書き出す"""
+        try:
+            while True:
+                item = _get(encode_queue, stop_event)
+                if item is None:
+                    return
+                frame, tracked_result = item
+                # フレーム (リングバッファのスロット) に直接描画し、書き出し後に解放する
+                annotated_frame = self._annotate_frame(
+                    frame_to_bgr(frame),
+                    tracked_result["players"],
+                    tracked_result["ball"]
+                )
+                video_writer.write(annotated_frame)
+                if ring is not None:
+                    ring.release()
+        except Exception as e:
+            errors.append(e)
+            # 検出側とデコード側も停止させる
+            stop_event.set()
+
     def _annotate_frame(
         self,
         frame: np.ndarray,
         players: List[TrackedDetection],
         balls: List[TrackedDetection]
     ) -> np.ndarray:
-        """フレームにトラッキング結果をアノテーション"""
-        annotated = frame.copy()
+        """
+        フレームにトラッキング結果をアノテーション
+
+        コピーを作らず、渡されたフレームに直接描画する (呼び出し元は書き出し後に
+        フレームを使わないため)。
+
+        Returns:
+            描画済みのフレーム (引数と同じ配列)
+        """
+        annotated = frame
         height, width = frame.shape[:2]
 
-        # 選手を描画
-        for player in players:
-            x, y, w, h = player.bbox
-            x1 = int(x * width)
-            y1 = int(y * height)
-            x2 = int((x + w) * width)
-            y2 = int((y + h) * height)
-
-            # バウンディングボックス
-            cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
-
-            # トラックID
-            label = f"{player.track_id}: {player.confidence:.2f}"
-            cv2.putText(
-                annotated,
-                label,
-                (x1, y1 - 10),
-                cv2.FONT_HERSHEY_SIMPLEX,
-                0.5,
-                (0, 255, 0),
-                2
-            )
+        # 座標計算は配列演算でまとめて行い、ループでは描画呼び出しのみ行う
+        # (int() と同じく0方向に切り捨てる)
+        if players:
+            bboxes = np.array([player.bbox for player in players], dtype=np.float64)
+            scale = np.array([width, height], dtype=np.float64)
+            corners = np.empty((len(players), 4), dtype=np.int32)
+            corners[:, :2] = bboxes[:, :2] * scale
+            corners[:, 2:] = (bboxes[:, :2] + bboxes[:, 2:]) * scale
+
+            # 選手を描画
+            for player, (x1, y1, x2, y2) in zip(players, corners.tolist(), strict=True):
+                # バウンディングボックス
+                cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
+
+                # トラックID
+                label = f"{player.track_id}: {player.confidence:.2f}"
+                cv2.putText(
+                    annotated,
+                    label,
+                    (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.5,
+                    (0, 255, 0),
+                    2
+                )
 
         # ボールを描画
-        for ball in balls:
-            cx, cy = ball.center
-            cx_px = int(cx * width)
-            cy_px = int(cy * height)
+        if balls:
+            centers = np.array([ball.center for ball in balls], dtype=np.float64)
+            centers_px = (centers * np.array([width, height], dtype=np.float64)).astype(np.int32)
 
-            # 円で描画
-            cv2.circle(annotated, (cx_px, cy_px), 10, (0, 0, 255), -1)
-            cv2.circle(annotated, (cx_px, cy_px), 12, (255, 255, 255), 2)
+            for cx_px, cy_px in centers_px.tolist():
+                # 円で描画
+                cv2.circle(annotated, (cx_px, cy_px), 10, (0, 0, 255), -1)
+                cv2.circle(annotated, (cx_px, cy_px), 12, (255, 255, 255), 2)
 
         return annotated
 
-    def save_result(self, result: PipelineResult, output_path: str):
-        """結果をファイルに保存"""
+    def save_result(self, result: PipelineResult, output_path: str) -> Future:
+        """
+        結果をファイルに保存 (非同期)
+
+        シリアライズと書き込みはI/Oスレッドで行い、呼び出し元はすぐに次の動画の
+        処理を始められる。書き込み完了を待つには戻り値の result() か flush() を呼ぶ。
+        書き込みが終わるまで result を変更しないこと。
+
+        Returns:
+            書き込み完了を表すFuture
+        """
+        if self.config.output_format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unsupported output format: {self.config.output_format} "
+                f"(expected one of {list(OUTPUT_FORMATS)})"
+            )
+        writer = _write_parquet if self.config.output_format == "parquet" else self._write_result
+
+        self._pending_writes = [f for f in self._pending_writes if not f.done()]
+        future = self._io_pool.submit(writer, result, output_path)
+        self._pending_writes.append(future)
+        return future
+
+    def flush(self):
+        """保存中の結果の書き込み完了を待つ (書き込みで発生した例外は再送出)"""
+        pending, self._pending_writes = self._pending_writes, []
+        for future in pending:
+            future.result()
+
+    def close(self):
+        """保存中の結果の書き込み完了を待ち、書き込み用スレッドを終了する"""
+        try:
+            self.flush()
+        finally:
+            self._io_pool.shutdown()
+
+    @staticmethod
+    def _write_result(result: PipelineResult, output_path: str):
+        """結果をシリアライズしてファイルに書き込む"""
+        # BallData・metadataはorjsonがそのままシリアライズするため、dictに作り直さない
         output_data = {
-            "tracks": [
-                {
-                    "trackId": track.trackId,
-                    "frames": track.frames
-                }
-                for track in result.tracks
-            ],
-            "ball": [
-                {
-                    "frameNumber": ball.frameNumber,
-                    "timestamp": ball.timestamp,
-                    "position": ball.position,
-                    "confidence": ball.confidence,
-                    "visible": ball.visible
-                }
-                for ball in result.ball
-            ],
+            "tracks": result.track_dicts(),
+            "ball": result.ball,
             "metadata": result.metadata
         }
 
-        with open(output_path, 'w') as f:
-            json.dump(output_data, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(orjson.dumps(output_data, option=orjson.OPT_INDENT_2))
 
     def load_result(self, input_path: str) -> PipelineResult:
-        """ファイルから結果を読み込み"""
-        with open(input_path, 'r') as f:
-            data = json.load(f)
+        """ファイルから結果を読み込み (拡張子が .parquet の場合はParquetとして読む)"""
+        if Path(input_path).suffix == ".parquet":
+            return _read_parquet(input_path)
+
+        with open(input_path, 'rb') as f:
+            data = orjson.loads(f.read())
 
         tracks = [
-            TrackData(trackId=t["trackId"], frames=t["frames"])
+            TrackData.from_frames(t["trackId"], t["frames"])
             for t in data["tracks"]
         ]
 
@@ -355,28 +775,201 @@ class TrackingPipeline:
         )
 
 
+OUTPUT_FORMATS = ("json", "parquet")
+
+
+def _ball_path(output_path: str) -> Path:
+    """Parquet出力時のボール検出ファイルのパス (output.parquet → output_ball.parquet)"""
+    path = Path(output_path)
+    return path.with_name(f"{path.stem}_ball{path.suffix}")
+
+
+def _import_pyarrow():
+    """pyarrowを遅延インポート (Parquet出力時のみ必要なオプション依存)"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError(
+            "output_format='parquet' requires pyarrow (pip install .[parquet])"
+        ) from e
+    return pa, pq
+
+
+def _write_parquet(result: PipelineResult, output_path: str):
+    """
+    結果を列指向のParquetで書き込む
+
+    選手トラックは1行 = (track_id, frame_number) で output_path に、ボール検出は
+    _ball_path(output_path) に保存する。メタデータはJSONとしてスキーマに埋め込む。
+    座標・信頼度はfloat32で保存する。
+    """
+    pa, pq = _import_pyarrow()
+    schema_metadata = {b"metadata": orjson.dumps(result.metadata)}
+
+    tracks = result.tracks
+    lengths = [len(track) for track in tracks]
+    bbox = np.concatenate([track.bbox for track in tracks]) if tracks else np.empty((0, 4))
+    center = np.concatenate([track.center for track in tracks]) if tracks else np.empty((0, 2))
+
+    def concat(column: str, dtype) -> np.ndarray:
+        if not tracks:
+            return np.empty(0, dtype=dtype)
+        return np.concatenate([getattr(track, column) for track in tracks]).astype(dtype, copy=False)
+
+    track_table = pa.table({
+        "track_id": pa.array(np.repeat([track.trackId for track in tracks], lengths).tolist(), pa.string())
+        .dictionary_encode(),
+        "frame_number": concat("frameNumber", np.int32),
+        "timestamp": concat("timestamp", np.float64),
+        "x": bbox[:, 0].astype(np.float32),
+        "y": bbox[:, 1].astype(np.float32),
+        "w": bbox[:, 2].astype(np.float32),
+        "h": bbox[:, 3].astype(np.float32),
+        "cx": center[:, 0].astype(np.float32),
+        "cy": center[:, 1].astype(np.float32),
+        "conf": concat("confidence", np.float32)
+    }).replace_schema_metadata(schema_metadata)
+
+    ball = result.ball
+    ball_table = pa.table({
+        "frame_number": np.array([b.frameNumber for b in ball], dtype=np.int32),
+        "timestamp": np.array([b.timestamp for b in ball], dtype=np.float64),
+        "x": np.array([b.position["x"] for b in ball], dtype=np.float32),
+        "y": np.array([b.position["y"] for b in ball], dtype=np.float32),
+        "conf": np.array([b.confidence for b in ball], dtype=np.float32),
+        "visible": np.array([b.visible for b in ball], dtype=bool)
+    }).replace_schema_metadata(schema_metadata)
+
+    pq.write_table(track_table, output_path, compression="zstd")
+    pq.write_table(ball_table, _ball_path(output_path), compression="zstd")
+
+
+def _read_parquet(input_path: str) -> PipelineResult:
+    """_write_parquet() で書き込んだ結果を読み込む"""
+    _, pq = _import_pyarrow()
+
+    track_table = pq.read_table(input_path)
+    columns = {name: track_table.column(name).to_numpy() for name in track_table.column_names
+               if name != "track_id"}
+    track_ids = np.asarray(track_table.column("track_id").to_pylist(), dtype=object)
+
+    # 行はトラックごとに連続しているため、track_idが変わる位置で分割する
+    boundaries = (np.flatnonzero(track_ids[1:] != track_ids[:-1]) + 1).tolist()
+    starts = [0] + boundaries
+    ends = boundaries + [len(track_ids)]
+    bbox = np.stack([columns[name] for name in ("x", "y", "w", "h")], axis=1).astype(np.float64)
+    center = np.stack([columns["cx"], columns["cy"]], axis=1).astype(np.float64)
+    tracks = [
+        TrackData(
+            trackId=track_ids[start],
+            frameNumber=columns["frame_number"][start:end],
+            timestamp=columns["timestamp"][start:end],
+            bbox=bbox[start:end],
+            center=center[start:end],
+            confidence=columns["conf"][start:end]
+        )
+        for start, end in zip(starts, ends, strict=True)
+        if end > start
+    ]
+
+    ball_columns = pq.read_table(_ball_path(input_path)).to_pydict()
+    ball = [
+        BallData(
+            frameNumber=frame_number,
+            timestamp=timestamp,
+            position={"x": x, "y": y},
+            confidence=confidence,
+            visible=visible
+        )
+        for frame_number, timestamp, x, y, confidence, visible in zip(
+            ball_columns["frame_number"],
+            ball_columns["timestamp"],
+            ball_columns["x"],
+            ball_columns["y"],
+            ball_columns["conf"],
+            ball_columns["visible"], strict=True
+        )
+    ]
+
+    metadata = orjson.loads(track_table.schema.metadata[b"metadata"])
+    return PipelineResult(tracks=tracks, ball=ball, metadata=metadata)
+
+
 def process_video_file(
     video_path: str,
     output_path: str,
-    config: Optional[PipelineConfig] = None
+    config: Optional[PipelineConfig] = None,
+    pipeline: Optional[TrackingPipeline] = None
 ) -> PipelineResult:
     """
     便利な動画処理関数
 
     Args:
         video_path: 入力動画ファイルパス
-        output_path: 出力JSONファイルパス
-        config: パイプライン設定
+        output_path: 出力ファイルパス (JSON、output_format="parquet"の場合はParquet)
+        config: パイプライン設定 (pipelineを渡した場合は使用しない)
+        pipeline: 使い回すパイプライン (Noneの場合はconfigから作成)
 
     Returns:
         トラッキング結果
     """
+    if pipeline is not None:
+        result = pipeline.process_video(video_path)
+        pipeline.save_result(result, output_path).result()
+        return result
+
+    # ここで作成したパイプラインは書き込み用スレッドごと閉じる
     pipeline = TrackingPipeline(config)
-    result = pipeline.process_video(video_path)
-    pipeline.save_result(result, output_path)
+    try:
+        result = pipeline.process_video(video_path)
+        pipeline.save_result(result, output_path)
+    finally:
+        pipeline.close()
     return result
 
 
+def process_many(
+    video_paths: Sequence[str],
+    output_paths: Sequence[str],
+    config: Optional[PipelineConfig] = None,
+    progress_callback: Optional[Callable[[int, int], None]] = None
+) -> List[PipelineResult]:
+    """
+    複数の動画を1つのパイプラインで順に処理する
+
+    モデルのロード・ウォームアップは最初の1回だけ行い、トラッカーは動画ごとに
+    リセットする。結果の書き込みは次の動画の処理と並行して行い、すべての
+    書き込みが終わってから返る。
+
+    Args:
+        video_paths: 入力動画ファイルパスのリスト
+        output_paths: 出力ファイルパスのリスト (video_pathsと同じ順序・長さ)
+        config: パイプライン設定
+        progress_callback: 動画ごとの進捗コールバック関数 (current_frame, total_frames)
+
+    Returns:
+        動画ごとのトラッキング結果のリスト
+    """
+    if len(video_paths) != len(output_paths):
+        raise ValueError(
+            f"video_paths and output_paths must have the same length "
+            f"({len(video_paths)} != {len(output_paths)})"
+        )
+
+    pipeline = TrackingPipeline(config)
+    results = []
+    try:
+        for video_path, output_path in zip(video_paths, output_paths, strict=True):
+            # トラッカーは process_video() の先頭でリセットされる
+            result = pipeline.process_video(video_path, progress_callback)
+            pipeline.save_result(result, output_path)
+            results.append(result)
+    finally:
+        pipeline.close()
+    return results
+
+
 if __name__ == "__main__":
     # テスト用コード
     import sys
@@ -0,0 +1,79 @@
+"""
+推論スレッド数の設定
+
+PyTorch (OpenMP/MKL)・OpenCV・APIのスレッドプールがそれぞれコア数分の
+スレッドを起動すると、コアを奪い合って推論スループットが大きく低下する。
+torch/numpyのimport前に環境変数を、import後にスレッドプールを明示的に設定する。
+
+環境変数:
+- INFERENCE_THREADS: 推論に使うスレッド数 (未指定時は論理コア数の半分)
+- CPU_AFFINITY: プロセスを固定するCPU番号 (例: "4-7" や "0,2,4")
+"""
+
+import os
+from typing import Optional, Set
+
+# torch/numpyが参照するスレッド数の環境変数
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+
+def configure_thread_env(num_threads: Optional[int] = None) -> int:
+    """
+    OpenMP/MKLのスレッド数を環境変数に設定 (torch/numpyのimport前に呼び出すこと)
+
+    既に設定されている環境変数は上書きしない。
+
+    Args:
+        num_threads: スレッド数 (Noneの場合はINFERENCE_THREADSまたは論理コア数の半分)
+
+    Returns:
+        実際に使用するスレッド数
+    """
+    if num_threads is None:
+        num_threads = int(os.environ.get("INFERENCE_THREADS", "0")) or max(1, (os.cpu_count() or 1) // 2)
+
+    for var in THREAD_ENV_VARS:
+        os.environ.setdefault(var, str(num_threads))
+
+    return int(os.environ["OMP_NUM_THREADS"])
+
+
+def configure_thread_pools(num_threads: int):
+    """
+    torch/OpenCVのスレッドプールを設定 (import後、最初の推論より前に呼び出すこと)
+
+    Args:
+        num_threads: torchのintra-opスレッド数
+    """
+    import cv2
+    import torch
+
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # 既に並列処理が開始されている場合は変更できない
+        pass
+
+    # OpenCV内部のスレッドプールは使わず、呼び出し元のスレッドで処理する
+    cv2.setNumThreads(0)
+
+    cpus = parse_cpu_list(os.environ.get("CPU_AFFINITY", ""))
+    if cpus and hasattr(os, "sched_setaffinity"):
+        # big.LITTLE構成などで性能コアのみに固定する
+        os.sched_setaffinity(0, cpus)
+
+
+def parse_cpu_list(spec: str) -> Set[int]:
+    """CPU番号リスト ("0-3,6" 形式) をパース"""
+    cpus: Set[int] = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "-" in part:
+            start, end = part.split("-", 1)
+            cpus.update(range(int(start), int(end) + 1))
+        else:
+            cpus.add(int(part))
+    return cpus
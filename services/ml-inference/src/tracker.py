@@ -5,14 +5,14 @@ supervisionライブラリのByteTrackを使用してフレーム間でIDを一
 """
 
 from dataclasses import dataclass
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence, Tuple, Union
 import numpy as np
 import supervision as sv
 
-from detector import Detection
+from detector import Detection, Detections, PlayerBallDetector
 
 
-@dataclass
+@dataclass(slots=True)
 class TrackedDetection:
     """トラックID付きの検出結果"""
 
@@ -28,6 +28,12 @@ class TrackedDetection:
 class ObjectTracker:
     """ByteTrackを使用したオブジェクトトラッカー"""
 
+    # supervisionへ渡す際の仮想的なフレームサイズ (正規化座標をこのサイズのピクセル座標に変換)
+    _FRAME_WIDTH = 1920
+    _FRAME_HEIGHT = 1080
+
+    _CLASS_ID_TO_NAME = {0: "person", 32: "sports ball"}
+
     def __init__(
         self,
         track_activation_threshold: float = 0.3,
@@ -43,30 +49,38 @@ class ObjectTracker:
             frame_rate: 動画のフレームレート (fps)
         """
         # supervision 0.18.0+ uses different parameter names
-        self.tracker = sv.ByteTrack(
-            track_thresh=track_activation_threshold,
-            track_buffer=lost_track_buffer,
-            match_thresh=minimum_matching_threshold,
-            frame_rate=frame_rate
-        )
+        self._byte_track_kwargs = {
+            "track_thresh": track_activation_threshold,
+            "track_buffer": lost_track_buffer,
+            "match_thresh": minimum_matching_threshold,
+            "frame_rate": frame_rate
+        }
+        self.tracker = sv.ByteTrack(**self._byte_track_kwargs)
         self.frame_rate = frame_rate
         self.current_frame = 0
 
+        # 座標変換用のスケール (フレームごとに作り直さない)
+        self._scale = np.array([self._FRAME_WIDTH, self._FRAME_HEIGHT], dtype=np.float64)
+
     def reset(self):
-        """トラッカーをリセット"""
-        self.tracker.reset()
+        """トラッカーをリセット (動画ごとにトラック状態を破棄する)"""
+        if hasattr(self.tracker, "reset"):
+            self.tracker.reset()
+        else:
+            # supervision 0.18 の ByteTrack には reset() がないため作り直す
+            self.tracker = sv.ByteTrack(**self._byte_track_kwargs)
         self.current_frame = 0
 
     def update(
         self,
-        detections: List[Detection],
+        detections: Union[Detections, Sequence[Detection]],
         frame_number: Optional[int] = None
     ) -> List[TrackedDetection]:
         """
         検出結果を更新してトラッキング結果を取得
 
         Args:
-            detections: 検出結果のリスト
+            detections: 検出結果 (DetectionsまたはDetectionのリスト)
             frame_number: フレーム番号 (Noneの場合は内部カウンターを使用)
 
         Returns:
@@ -80,37 +94,32 @@ class ObjectTracker:
         # タイムスタンプを計算
         timestamp = self.current_frame / self.frame_rate
 
-        # supervisionの形式に変換
-        # 仮想的なフレームサイズを使用 (1920x1080)
-        frame_width, frame_height = 1920, 1080
+        if not len(detections):
+            # 検出がない場合もトラックの経過フレーム数を進めるため更新する
+            # (対応付ける検出がないため、アクティブなトラックは返らない)
+            # (ByteTrackは入力の tracker_id を書き換えるため、空の検出結果は毎回作る)
+            try:
+                self.tracker.update_with_detections(sv.Detections.empty())
+            except Exception as e:
+                print(f"ByteTrack update failed: {e}")
+            return []
 
-        if not detections:
-            # 検出がない場合でも更新してトラック状態を維持
-            sv_detections = sv.Detections.empty()
-        else:
-            # バウンディングボックスを非正規化 (supervisionはピクセル座標を期待)
-            xyxy = []
-            confidences = []
-            class_ids = []
-
-            for det in detections:
-                x, y, w, h = det.bbox
-                # 正規化座標 → ピクセル座標
-                x1 = x * frame_width
-                y1 = y * frame_height
-                x2 = (x + w) * frame_width
-                y2 = (y + h) * frame_height
-
-                xyxy.append([x1, y1, x2, y2])
-                confidences.append(det.confidence)
-                class_ids.append(det.class_id)
-
-            # Explicit dtypes for supervision compatibility
-            sv_detections = sv.Detections(
-                xyxy=np.array(xyxy, dtype=np.float32),
-                confidence=np.array(confidences, dtype=np.float32),
-                class_id=np.array(class_ids, dtype=np.int32)
-            )
+        # supervisionの形式に変換
+        bboxes, confidences, class_ids = _as_arrays(detections)
+
+        # バウンディングボックスを非正規化 (supervisionはピクセル座標を期待)
+        # 正規化座標 (x, y, w, h) → ピクセル座標 (x1, y1, x2, y2) を配列演算でまとめて変換
+        xyxy = np.empty((len(bboxes), 4), dtype=np.float32)
+        xyxy[:, :2] = bboxes[:, :2] * self._scale
+        xyxy[:, 2:] = (bboxes[:, :2] + bboxes[:, 2:]) * self._scale
+
+        # supervisionと同じdtypeに揃える (xyxy/confidenceはfloat32、class_idは
+        # supervision自身が出力するint64)。xyxyは上で確保したC連続配列をそのまま渡す
+        sv_detections = sv.Detections(
+            xyxy=xyxy,
+            confidence=confidences.astype(np.float32, copy=False),
+            class_id=class_ids.astype(np.int64, copy=False)
+        )
 
         # ByteTrackで更新
         try:
@@ -119,61 +128,85 @@ class ObjectTracker:
             print(f"ByteTrack update failed: {e}")
             return []
 
-        # 結果を変換
-        tracked_detections = []
-
         # Check if tracker_id exists and has elements
         if tracked.tracker_id is None or len(tracked.xyxy) == 0:
-            return tracked_detections
-
-        # Create class_id to class_name mapping
-        class_id_to_name = {0: "person", 32: "sports ball"}
-
-        for i in range(len(tracked.xyxy)):
-            # Safely get tracker_id
-            if tracked.tracker_id is None or i >= len(tracked.tracker_id):
-                continue
-
-            tracker_id_val = tracked.tracker_id[i]
-            if tracker_id_val is None:
-                continue
-
-            track_id = f"track_{int(tracker_id_val)}"
-            x1, y1, x2, y2 = tracked.xyxy[i]
+            return []
 
-            # ピクセル座標 → 正規化座標
-            x_norm = x1 / frame_width
-            y_norm = y1 / frame_height
-            w_norm = (x2 - x1) / frame_width
-            h_norm = (y2 - y1) / frame_height
+        # 座標変換・中心点の計算は配列演算でまとめて行い、ループではオブジェクトの生成のみ行う
+        count = min(len(tracked.xyxy), len(tracked.tracker_id))
+        bboxes, centers = _normalize_tracked(tracked.xyxy[:count], self._scale)
 
-            # 中心点を計算
-            center_x = x_norm + w_norm / 2
-            center_y = y_norm + h_norm / 2
+        track_ids = [f"track_{tracker_id}" for tracker_id in tracked.tracker_id[:count].tolist()]
 
-            # Get class_name from tracked object's class_id (not index correlation)
-            class_name = "person"  # Default
-            if tracked.class_id is not None and i < len(tracked.class_id):
-                class_id_val = int(tracked.class_id[i])
-                class_name = class_id_to_name.get(class_id_val, "person")
+        # Get class_name from tracked object's class_id (not index correlation)
+        if tracked.class_id is not None and len(tracked.class_id) >= count:
+            class_names = [
+                self._CLASS_ID_TO_NAME.get(class_id, "person")
+                for class_id in tracked.class_id[:count].tolist()
+            ]
+        else:
+            class_names = ["person"] * count
 
-            # Safely get confidence
-            confidence = 0.0
-            if tracked.confidence is not None and i < len(tracked.confidence):
-                confidence = float(tracked.confidence[i])
+        # Safely get confidence
+        if tracked.confidence is not None and len(tracked.confidence) >= count:
+            confidences = tracked.confidence[:count].tolist()
+        else:
+            confidences = [0.0] * count
 
-            tracked_det = TrackedDetection(
+        frame_number = self.current_frame
+        return [
+            TrackedDetection(
                 track_id=track_id,
-                frame_number=self.current_frame,
+                frame_number=frame_number,
                 timestamp=timestamp,
-                bbox=(x_norm, y_norm, w_norm, h_norm),
-                center=(center_x, center_y),
+                bbox=tuple(bbox),
+                center=tuple(center),
                 confidence=confidence,
                 class_name=class_name
             )
-            tracked_detections.append(tracked_det)
+            for track_id, bbox, center, confidence, class_name in zip(
+                track_ids, bboxes.tolist(), centers.tolist(), confidences, class_names, strict=True
+            )
+        ]
+
+
+def _normalize_tracked(
+    xyxy: np.ndarray,
+    scale: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ピクセル座標のxyxyを正規化座標のbbox (x, y, w, h) と中心点 (x, y) に変換
+
+    Args:
+        xyxy: ピクセル座標 (N, 4)
+        scale: フレームサイズ (width, height)
 
-        return tracked_detections
+    Returns:
+        (bbox (N, 4), center (N, 2))
+    """
+    bboxes = np.empty((len(xyxy), 4), dtype=np.float64)
+    bboxes[:, :2] = xyxy[:, :2]
+    # 幅・高さはベクトル化前のスカラー演算と同じくfloat32のまま差を取り、除算はfloat64で行う
+    # (描画時の int() による切り捨て結果も従来と一致する)
+    bboxes[:, 2:] = xyxy[:, 2:] - xyxy[:, :2]
+    bboxes[:, :2] /= scale
+    bboxes[:, 2:] /= scale
+    centers = bboxes[:, :2] + bboxes[:, 2:] / 2
+    return bboxes, centers
+
+
+def _as_arrays(
+    detections: Union[Detections, Sequence[Detection]]
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """検出結果を (bbox (N, 4), confidence (N,), class_id (N,)) の配列に変換"""
+    if isinstance(detections, Detections):
+        return detections.bbox, detections.confidence, detections.class_id
+
+    return (
+        np.array([det.bbox for det in detections], dtype=np.float64).reshape(-1, 4),
+        np.array([det.confidence for det in detections], dtype=np.float32),
+        np.array([det.class_id for det in detections], dtype=np.int64)
+    )
 
 
 class MultiClassTracker:
@@ -225,22 +258,21 @@ class MultiClassTracker:
 
     def update(
         self,
-        detections: List[Detection],
+        detections: Union[Detections, Sequence[Detection]],
         frame_number: Optional[int] = None
     ) -> Dict[str, List[TrackedDetection]]:
         """
         検出結果を更新してトラッキング結果を取得
 
         Args:
-            detections: 検出結果のリスト
+            detections: 検出結果 (DetectionsまたはDetectionのリスト)
             frame_number: フレーム番号
 
         Returns:
             {"players": [...], "ball": [...]}
         """
-        # クラスごとに分離
-        player_detections = [d for d in detections if d.class_name == "person"]
-        ball_detections = [d for d in detections if d.class_name == "sports ball"]
+        # クラスごとに分離 (クラス名の文字列ではなくclass_idで比較する)
+        player_detections, ball_detections = _split_by_class(detections)
 
         # それぞれトラッキング
         tracked_players = self.player_tracker.update(player_detections, frame_number)
@@ -252,6 +284,30 @@ class MultiClassTracker:
         }
 
 
+def _split_by_class(
+    detections: Union[Detections, Sequence[Detection]]
+) -> Tuple[Union[Detections, List[Detection]], Union[Detections, List[Detection]]]:
+    """検出結果を (選手, ボール) に分離"""
+    person_id = PlayerBallDetector.PERSON_CLASS_ID
+    ball_id = PlayerBallDetector.SPORTS_BALL_CLASS_ID
+
+    if isinstance(detections, Detections):
+        # Detectionsはclass_id配列のマスクでまとめて分離する
+        return (
+            detections[detections.class_id == person_id],
+            detections[detections.class_id == ball_id]
+        )
+
+    player_detections = []
+    ball_detections = []
+    for det in detections:
+        if det.class_id == person_id:
+            player_detections.append(det)
+        elif det.class_id == ball_id:
+            ball_detections.append(det)
+    return player_detections, ball_detections
+
+
 def create_tracker(
     frame_rate: int = 30,
     multi_class: bool = True
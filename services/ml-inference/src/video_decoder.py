@@ -0,0 +1,432 @@
+"""
+並列動画デコーダー
+
+オフライン処理向けに、動画を一定フレーム数のチャンクに分割して複数のプロセスで
+並列にデコードする。チャンクはラウンドロビンでワーカーに割り当て、各ワーカーは
+担当チャンクの先頭へシークしてから順にデコードする。トラッキングは時系列順の入力を
+必要とするため、フレームはチャンク順 (= 元のフレーム順) に並べ直して返す。
+
+シーク時は直前のキーフレームからデコードし直すため、キーフレーム間隔が
+チャンクサイズより十分小さい動画ほど並列化の効果が大きい。
+
+フレームはpickleしてプロセス間で送らず、ワーカーごとの共有メモリ上のスロットに
+直接デコードし、キューにはスロット番号のみを流す。
+
+単一スレッドでのデコード用に、フレーム配列を使い回すリングバッファと、
+torchcodec (NVDEC) でGPU上にデコードするリーダーも提供する。
+NV12の生フレームをGPU上でRGBに変換する関数も提供する。
+"""
+
+import multiprocessing as mp
+import queue
+import threading
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Callable, Iterator, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+if TYPE_CHECKING:
+    import torch
+
+
+DEFAULT_CHUNK_SIZE = 32
+
+# ワーカーの生存確認を行う間隔 (秒)
+_POLL_INTERVAL = 1.0
+
+
+def _slot_views(
+    shm: shared_memory.SharedMemory,
+    num_slots: int,
+    shape: Tuple[int, ...]
+) -> List[np.ndarray]:
+    """共有メモリをフレーム形状のスロット配列に分割"""
+    frame_bytes = int(np.prod(shape))
+    return [
+        np.ndarray(shape, dtype=np.uint8, buffer=shm.buf, offset=slot * frame_bytes)
+        for slot in range(num_slots)
+    ]
+
+
+def _decode_chunks(
+    video_path: str,
+    chunks: List[Tuple[int, int]],
+    skip_frames: int,
+    shm_name: str,
+    num_slots: int,
+    frame_shape: Tuple[int, ...],
+    free_queue: mp.Queue,
+    out_queue: mp.Queue
+):
+    """
+    ワーカープロセスのエントリポイント: 担当チャンクを順にデコードする
+
+    フレームは free_queue から受け取った番号の共有メモリスロットにデコードし、
+    キューには ("frame", frame_number, slot)、チャンク終端で ("end", start, None)、
+    失敗時に ("error", message, None) を流す。
+    """
+    cap = cv2.VideoCapture(video_path)
+    shm = None
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Failed to open video: {video_path}")
+
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _decode_into_slots(
+            cap, chunks, skip_frames,
+            _slot_views(shm, num_slots, frame_shape),
+            free_queue, out_queue
+        )
+    except Exception as e:
+        out_queue.put(("error", str(e), None))
+    finally:
+        cap.release()
+        if shm is not None:
+            shm.close()
+
+
+def _decode_into_slots(
+    cap: cv2.VideoCapture,
+    chunks: List[Tuple[int, int]],
+    skip_frames: int,
+    views: List[np.ndarray],
+    free_queue: mp.Queue,
+    out_queue: mp.Queue
+):
+    """担当チャンクを共有メモリのスロットへデコード (スロットの参照はこの関数内に閉じる)"""
+    position = 0
+    for start, end in chunks:
+        if start != position:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+            position = start
+
+        for frame_number in range(start, end):
+            if skip_frames > 0 and frame_number % (skip_frames + 1) != 0:
+                # スキップするフレームは色変換などを行わない
+                ret = cap.grab()
+                position += 1
+                if not ret:
+                    break
+                continue
+
+            # メインプロセスが返却したスロットに直接デコードする
+            slot = free_queue.get()
+            view = views[slot]
+            ret, frame = cap.read(view)
+            position += 1
+            if not ret:
+                # 使わなかったスロットは次のデコードのために戻す
+                free_queue.put(slot)
+                break
+            if frame.shape != view.shape:
+                raise ValueError(
+                    f"Decoded frame {frame_number} has shape {frame.shape}, "
+                    f"expected {view.shape} (frame size changes within the video are not supported)"
+                )
+            if frame is not view:
+                # OpenCVが出力先を使わずに新しい配列を返した場合 (形状は同じ) はコピーする
+                np.copyto(view, frame)
+            out_queue.put(("frame", frame_number, slot))
+
+        out_queue.put(("end", start, None))
+
+
+class ParallelVideoDecoder:
+    """
+    複数プロセスで動画をデコードし、フレームを元の順序で返すイテレータ
+
+    各ワーカーは専用の共有メモリ (チャンク1つ分のスロット) にデコードし、
+    メインプロセスはスロットの内容を出力先の配列にコピーしてからスロットを返却する。
+
+    ワーカーはspawnで起動し、呼び出し元のスクリプトを子プロセスで再importする。
+    そのためスクリプトからデコーダー (decode_workers >= 2 のパイプライン) を使う場合は、
+    処理を ``if __name__ == "__main__":`` の中で実行すること (ガードがないと子プロセスが
+    同じ処理を再実行し、起動時にRuntimeErrorとなる)。
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        num_frames: int,
+        num_workers: int = 2,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        skip_frames: int = 0
+    ):
+        """
+        Args:
+            video_path: 動画ファイルパス
+            num_frames: デコードするフレーム範囲 [0, num_frames)
+            num_workers: デコードするプロセス数
+            chunk_size: 1チャンクのフレーム数 (各ワーカーは最大1チャンク分先読みする)
+            skip_frames: スキップするフレーム数 (frame_number % (skip_frames + 1) == 0 のフレームのみ返す)
+        """
+        if num_workers < 1:
+            raise ValueError(f"num_workers must be >= 1, got {num_workers}")
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be >= 1, got {chunk_size}")
+
+        self.video_path = video_path
+        self.num_workers = num_workers
+        self.chunk_size = chunk_size
+        self.skip_frames = skip_frames
+
+        self._chunks = [
+            (start, min(start + chunk_size, num_frames))
+            for start in range(0, num_frames, chunk_size)
+        ]
+        self._ctx = mp.get_context("spawn")
+        self._frame_shape: Optional[Tuple[int, ...]] = None
+        self._shms: List[shared_memory.SharedMemory] = []
+        self._views: List[List[np.ndarray]] = []
+        self._free_queues: List[mp.Queue] = []
+        self._queues: List[mp.Queue] = []
+        self._processes: List[mp.Process] = []
+
+    def start(self):
+        """共有メモリを確保してワーカープロセスを起動"""
+        self._frame_shape = probe_frame_shape(self.video_path)
+        frame_bytes = int(np.prod(self._frame_shape))
+
+        # スロット数で先読みを1チャンク分 (処理対象のフレーム数) に抑える
+        num_slots = -(-self.chunk_size // (self.skip_frames + 1)) + 1
+        try:
+            for worker in range(min(self.num_workers, len(self._chunks))):
+                shm = shared_memory.SharedMemory(create=True, size=num_slots * frame_bytes)
+                self._shms.append(shm)
+                self._views.append(_slot_views(shm, num_slots, self._frame_shape))
+
+                free_queue = self._ctx.Queue()
+                for slot in range(num_slots):
+                    free_queue.put(slot)
+                out_queue = self._ctx.Queue()
+                self._free_queues.append(free_queue)
+                self._queues.append(out_queue)
+
+                process = self._ctx.Process(
+                    target=_decode_chunks,
+                    args=(
+                        self.video_path,
+                        self._chunks[worker::self.num_workers],
+                        self.skip_frames,
+                        shm.name,
+                        num_slots,
+                        self._frame_shape,
+                        free_queue,
+                        out_queue
+                    ),
+                    daemon=True
+                )
+                process.start()
+                self._processes.append(process)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        """ワーカープロセスを終了し、共有メモリを解放"""
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=5)
+        for q in self._queues + self._free_queues:
+            q.close()
+            q.cancel_join_thread()
+        # スロットの配列は外部に渡していないため、ここで確実にマッピングを閉じられる
+        self._views = []
+        for shm in self._shms:
+            shm.close()
+            shm.unlink()
+        self._shms = []
+        self._processes = []
+        self._queues = []
+        self._free_queues = []
+
+    def __enter__(self) -> "ParallelVideoDecoder":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def __iter__(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """(frame_number, frame) をフレーム順に返す (フレームごとに新しい配列を確保)"""
+        return self.iter_into(lambda: np.empty(self._frame_shape, dtype=np.uint8))
+
+    def iter_into(
+        self,
+        acquire: Callable[[], Optional[np.ndarray]]
+    ) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        (frame_number, frame) をフレーム順に返す
+
+        Args:
+            acquire: フレームのコピー先となる (H, W, 3) uint8 配列を返す関数
+                (FrameRingBufferのスロット等)。Noneを返した場合はそこで終了する。
+        """
+        if not self._processes and self._chunks:
+            raise RuntimeError("ParallelVideoDecoder is not started")
+
+        for index in range(len(self._chunks)):
+            worker = index % len(self._processes)
+            while True:
+                kind, value, slot = self._get(worker)
+                if kind == "frame":
+                    dst = acquire()
+                    if dst is None:
+                        return
+                    if dst.shape != self._frame_shape:
+                        raise ValueError(
+                            f"Output frame shape {dst.shape} does not match decoded shape {self._frame_shape}"
+                        )
+                    np.copyto(dst, self._views[worker][slot])
+                    # コピーが済んだスロットはすぐにワーカーへ返却する
+                    self._free_queues[worker].put(slot)
+                    yield value, dst
+                elif kind == "end":
+                    break
+                else:
+                    raise RuntimeError(f"Video decode worker failed: {value}")
+
+    def _get(self, worker: int) -> Tuple[str, Optional[int], Optional[np.ndarray]]:
+        """ワーカーのキューから1件取り出す (ワーカーが異常終了した場合は例外)"""
+        while True:
+            try:
+                return self._queues[worker].get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                process = self._processes[worker]
+                if not process.is_alive():
+                    raise RuntimeError(
+                        f"Video decode worker exited with code {process.exitcode}"
+                    ) from None
+
+
+def probe_frame_shape(video_path: str) -> Tuple[int, int, int]:
+    """
+    動画のフレーム形状 (height, width, 3) を取得
+
+    CAP_PROP_FRAME_WIDTH/HEIGHT は自動回転 (スマートフォンの縦動画等) 後のサイズと
+    異なる場合があるため、ワーカーと同じく実際に先頭フレームをデコードして求める。
+    """
+    cap = cv2.VideoCapture(video_path)
+    try:
+        if not cap.isOpened():
+            raise ValueError(f"Failed to open video: {video_path}")
+        ret, frame = cap.read()
+    finally:
+        cap.release()
+    if not ret or frame.ndim != 3 or frame.shape[2] != 3:
+        raise ValueError(f"Failed to read frame size: {video_path}")
+    return frame.shape
+
+
+class FrameRingBuffer:
+    """
+    デコード済みフレーム用の固定長リングバッファ
+
+    フレームごとに (H, W, 3) の配列を確保せず、事前に確保したスロットへ順に書き込む。
+    スロットは取得した順に解放すること (FIFO)。空きスロットがない間 acquire() は待機する。
+    """
+
+    def __init__(self, num_slots: int, shape: Tuple[int, ...]):
+        """
+        Args:
+            num_slots: スロット数 (同時に使用中になりうるフレーム数以上にする)
+            shape: フレームの形状 (height, width, 3)
+        """
+        if num_slots < 1:
+            raise ValueError(f"num_slots must be >= 1, got {num_slots}")
+
+        self._slots = [np.empty(shape, dtype=np.uint8) for _ in range(num_slots)]
+        self._free = threading.Semaphore(num_slots)
+        self._next = 0
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[np.ndarray]:
+        """次のスロットを取得 (timeout内に空かなければNone)"""
+        if not self._free.acquire(timeout=timeout):
+            return None
+        slot = self._slots[self._next]
+        self._next = (self._next + 1) % len(self._slots)
+        return slot
+
+    def release(self):
+        """最も古い使用中スロットを解放"""
+        self._free.release()
+
+
+class NvdecVideoReader:
+    """
+    torchcodec (NVDEC) で動画をGPUメモリ上にデコードするリーダー
+
+    フレームは (3, H, W) uint8 RGB のCUDAテンソルとして返し、ホストへ転送しない。
+    torchcodecはオプション依存のため、未インストール時は生成時にImportErrorとなる。
+    """
+
+    def __init__(self, video_path: str, device: str = "cuda"):
+        """
+        Args:
+            video_path: 動画ファイルパス
+            device: デコード先のCUDAデバイス
+        """
+        from torchcodec.decoders import VideoDecoder
+
+        self._decoder = VideoDecoder(video_path, device=device)
+
+    def iter_frames(
+        self,
+        num_frames: int,
+        skip_frames: int = 0,
+        window: int = 8
+    ) -> Iterator[Tuple[int, "torch.Tensor"]]:
+        """
+        (frame_number, frame) をフレーム順に返す
+
+        Args:
+            num_frames: デコードするフレーム範囲 [0, num_frames)
+            skip_frames: スキップするフレーム数
+            window: 1回のデコード呼び出しで取り出すフレーム数
+        """
+        step = skip_frames + 1
+        available = self._decoder.metadata.num_frames
+        if available is not None:
+            num_frames = min(num_frames, available)
+
+        for start in range(0, num_frames, window * step):
+            stop = min(start + window * step, num_frames)
+            batch = self._decoder.get_frames_in_range(start, stop, step=step)
+            for offset, frame in enumerate(batch.data):
+                yield start + offset * step, frame
+
+
+def nv12_to_rgb(data: bytes, width: int, height: int, device) -> "torch.Tensor":
+    """
+    NV12の生フレームをデバイスへ転送し、(3, H, W) uint8 RGBテンソルに変換
+
+    ホストではYUVのまま転送だけを行い、色変換はデバイス上で行う。
+    係数はOpenCVの COLOR_YUV2BGR_NV12 と同じBT.601 (limited range)。
+
+    Args:
+        data: NV12のバイト列 (Y面 W*H + UVインターリーブ面 W*H/2)
+        width: フレームの幅 (偶数)
+        height: フレームの高さ (偶数)
+        device: 変換先のデバイス
+    """
+    import torch
+
+    # bytesは書き込み不可のため、転送元のバッファはbytearrayにコピーして作る
+    planes = torch.frombuffer(bytearray(data), dtype=torch.uint8).to(device, non_blocking=True)
+    y = planes[:width * height].view(height, width).float()
+    uv = planes[width * height:].view(height // 2, width // 2, 2).float() - 128
+    uv = uv.repeat_interleave(2, dim=0).repeat_interleave(2, dim=1)
+    u, v = uv[..., 0], uv[..., 1]
+
+    y = (y - 16).clamp_(min=0) * 1.164
+    rgb = torch.stack((y + 1.596 * v, y - 0.813 * v - 0.391 * u, y + 2.018 * u))
+    return rgb.round_().clamp_(0, 255).to(torch.uint8)
+
+
+def frame_to_bgr(frame) -> np.ndarray:
+    """フレームをホストのBGR配列に変換 (NVDECのRGBテンソルの場合のみ変換する)"""
+    if isinstance(frame, np.ndarray):
+        return frame
+    return frame.permute(1, 2, 0).flip(-1).contiguous().cpu().numpy()
@@ -0,0 +1,10 @@
+"""
+テスト共通設定
+
+src/ のモジュールは互いにトップレベルモジュールとしてimportするため、src/ をパスに追加する。
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
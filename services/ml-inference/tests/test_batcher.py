@@ -0,0 +1,139 @@
+"""batcher (DynamicBatcher) のテスト"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from batcher import DynamicBatcher
+
+
+class RecordingRunner:
+    """呼び出されたバッチを記録し、フレームごとに (params, 先頭画素値) を返すバッチ実行関数"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, frames, params):
+        self.calls.append((params, len(frames)))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return [(params, int(frame.flat[0])) for frame in frames]
+
+
+def _frame(value: int, shape=(4, 6, 3)) -> np.ndarray:
+    return np.full(shape, value, dtype=np.uint8)
+
+
+async def test_submit_returns_result_for_each_frame():
+    """同時に投入したフレームが1回のバッチにまとまり、それぞれの結果が返る"""
+    runner = RecordingRunner()
+    batcher = DynamicBatcher(runner, max_batch_size=8, max_latency_ms=20)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(*[batcher.submit(_frame(i), "p") for i in range(5)])
+    finally:
+        await batcher.stop()
+
+    assert results == [("p", i) for i in range(5)]
+    assert runner.calls == [("p", 5)]
+
+
+async def test_submit_respects_max_batch_size_and_params():
+    """最大件数で分割され、パラメータの異なるリクエストは別バッチになる"""
+    runner = RecordingRunner()
+    batcher = DynamicBatcher(runner, max_batch_size=3, max_latency_ms=20)
+    await batcher.start()
+    try:
+        params = ["a", "b", "a", "a", "a"]
+        results = await asyncio.gather(
+            *[batcher.submit(_frame(i), p) for i, p in enumerate(params)]
+        )
+    finally:
+        await batcher.stop()
+
+    assert results == [(p, i) for i, p in enumerate(params)]
+    # [a, b, a] と [a, a] の2バッチに分かれ、1つ目はパラメータごとに分割される
+    assert runner.calls == [("a", 2), ("b", 1), ("a", 2)]
+
+
+async def test_frames_with_different_shapes_are_batched_separately():
+    """letterboxのサイズを共有しないよう、形状の異なるフレームは別バッチになる"""
+    runner = RecordingRunner()
+    batcher = DynamicBatcher(runner, max_batch_size=8, max_latency_ms=20)
+    await batcher.start()
+    try:
+        shapes = [(4, 6, 3), (8, 6, 3), (4, 6, 3)]
+        results = await asyncio.gather(
+            *[batcher.submit(_frame(i, shape), "p") for i, shape in enumerate(shapes)]
+        )
+    finally:
+        await batcher.stop()
+
+    assert results == [("p", 0), ("p", 1), ("p", 2)]
+    assert runner.calls == [("p", 2), ("p", 1)]
+
+
+async def test_run_batch_error_is_propagated():
+    """バッチ実行の例外がそのバッチの全リクエストに伝わる"""
+    async def failing(frames, params):
+        raise RuntimeError("inference failed")
+
+    batcher = DynamicBatcher(failing, max_batch_size=4, max_latency_ms=5)
+    await batcher.start()
+    try:
+        results = await asyncio.gather(
+            batcher.submit(_frame(0), "p"), batcher.submit(_frame(1), "p"),
+            return_exceptions=True
+        )
+    finally:
+        await batcher.stop()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+async def test_missing_results_fail_the_batch():
+    """結果の件数がフレーム数と合わない場合、待ち続けるリクエストを残さず全体を失敗させる"""
+    async def truncated(frames, params):
+        return [params] * (len(frames) - 1)
+
+    batcher = DynamicBatcher(truncated, max_batch_size=4, max_latency_ms=5)
+    await batcher.start()
+    try:
+        results = await asyncio.wait_for(asyncio.gather(
+            batcher.submit(_frame(0), "p"), batcher.submit(_frame(1), "p"),
+            return_exceptions=True
+        ), timeout=5)
+    finally:
+        await batcher.stop()
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert "1 results for 2 frames" in str(results[0])
+
+
+async def test_submit_before_start_raises():
+    batcher = DynamicBatcher(RecordingRunner())
+    with pytest.raises(RuntimeError):
+        await batcher.submit(_frame(0), "p")
+
+
+async def test_stop_cancels_queued_requests():
+    """停止時に推論中・キューに残ったリクエストはキャンセルされ、停止後は投入できない"""
+    runner = RecordingRunner(delay=0.2)
+    batcher = DynamicBatcher(runner, max_batch_size=1, max_latency_ms=0)
+    await batcher.start()
+
+    tasks = [asyncio.create_task(batcher.submit(_frame(i), "p")) for i in range(3)]
+    await asyncio.sleep(0.05)  # 1件目の推論中に停止する
+    await batcher.stop()
+
+    results = await asyncio.gather(*tasks, return_exceptions=True)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    with pytest.raises(RuntimeError):
+        await batcher.submit(_frame(0), "p")
+
+
+def test_invalid_max_batch_size():
+    with pytest.raises(ValueError):
+        DynamicBatcher(RecordingRunner(), max_batch_size=0)
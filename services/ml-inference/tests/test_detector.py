@@ -0,0 +1,110 @@
+"""detector (create_detector) のテスト"""
+
+import pytest
+
+import detector
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """PlayerBallDetectorを生成せず、渡された引数を記録する"""
+    calls = []
+
+    def fake_detector(**kwargs):
+        calls.append(kwargs)
+        return kwargs
+
+    monkeypatch.setattr(detector, "PlayerBallDetector", fake_detector)
+    return calls
+
+
+def _export_to(path):
+    def fake_export(model_path, export_format, **kwargs):
+        return path
+    return fake_export
+
+
+def test_fp16_export_is_inferred_in_fp16(monkeypatch, built):
+    """FP16でエクスポートしたモデルはFP16の入力で推論する (precisionがfp32のままでも)"""
+    monkeypatch.setattr(detector, "export_model", _export_to("yolov8n_fp16_b8.onnx"))
+
+    detector.create_detector(device="cuda", export_format="onnx", half=True, batch=8)
+
+    assert built[-1]["model_path"] == "yolov8n_fp16_b8.onnx"
+    assert built[-1]["half"] is True
+
+
+def test_failed_export_falls_back_to_fp32_weights(monkeypatch, built):
+    def failing_export(*args, **kwargs):
+        raise RuntimeError("no TensorRT")
+
+    monkeypatch.setattr(detector, "export_model", failing_export)
+
+    detector.create_detector(device="cpu", export_format="engine", half=True)
+
+    assert built[-1]["model_path"] == "yolov8n.pt"
+    assert built[-1]["half"] is False
+
+
+@pytest.mark.parametrize("kwargs, half", [
+    ({"device": "cuda", "half": True}, False),  # エクスポートしない場合のhalfはエクスポート用の指定
+    ({"device": "cuda", "precision": "fp16"}, True),
+    ({"device": "cpu"}, False),
+])
+def test_pytorch_weights_precision(monkeypatch, built, kwargs, half):
+    monkeypatch.setattr(detector, "export_model", _export_to("unused"))
+
+    detector.create_detector(**kwargs)
+
+    assert built[-1]["model_path"] == "yolov8n.pt"
+    assert built[-1]["half"] is half
+
+
+class FakeYOLO:
+    """Ultralyticsと同じく、設定によらず重みと同じ名前の成果物を書き出すエクスポーター"""
+
+    exports = []
+
+    def __init__(self, model_path, task=None):
+        self.model_path = model_path
+
+    def export(self, format, **kwargs):
+        FakeYOLO.exports.append((format, kwargs))
+        path = f"{self.model_path[:-3]}.{format}"
+        with open(path, "w") as f:
+            f.write(repr(kwargs))
+        return path
+
+
+@pytest.fixture
+def fake_yolo(monkeypatch):
+    FakeYOLO.exports = []
+    monkeypatch.setattr(detector, "YOLO", FakeYOLO)
+    return FakeYOLO
+
+
+def test_export_artifact_name_includes_precision_and_batch(tmp_path, fake_yolo):
+    weights = str(tmp_path / "yolov8n.pt")
+
+    fp16 = detector.export_model(weights, "engine", half=True, batch=8)
+    int8 = detector.export_model(weights, "engine", half=True, int8=True, batch=8)
+    fp16_b16 = detector.export_model(weights, "engine", half=True, batch=16)
+    fp32 = detector.export_model(weights, "onnx", batch=8)
+
+    assert fp16 == str(tmp_path / "yolov8n_fp16_b8.engine")
+    assert int8 == str(tmp_path / "yolov8n_int8_b8.engine")
+    assert fp16_b16 == str(tmp_path / "yolov8n_fp16_b16.engine")
+    assert fp32 == str(tmp_path / "yolov8n_fp32_b8.onnx")
+    assert len(fake_yolo.exports) == 4
+    # Ultralyticsが書き出した名前には残さない
+    assert not (tmp_path / "yolov8n.engine").exists()
+
+
+def test_export_reuses_artifact_with_same_settings(tmp_path, fake_yolo):
+    weights = str(tmp_path / "yolov8n.pt")
+
+    first = detector.export_model(weights, "onnx", half=True, batch=8)
+    second = detector.export_model(weights, "onnx", half=True, batch=8)
+
+    assert first == second
+    assert len(fake_yolo.exports) == 1
@@ -0,0 +1,79 @@
+"""inference_worker (InferenceWorker) の共有メモリスロット管理のテスト"""
+
+import asyncio
+import queue
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from inference_worker import InferenceWorker
+
+SLOT_BYTES = 64 * 48 * 3
+
+
+class AliveProcess:
+    """常に実行中として振る舞うワーカープロセスの代わり"""
+
+    def is_alive(self) -> bool:
+        return True
+
+
+@pytest.fixture
+async def worker():
+    """子プロセスを起動せず、送信されたリクエストをキューに溜めるクライアント"""
+    worker = InferenceWorker({}, num_slots=2, slot_bytes=SLOT_BYTES)
+    worker._loop = asyncio.get_running_loop()
+    worker._slots = [shared_memory.SharedMemory(create=True, size=SLOT_BYTES) for _ in range(2)]
+    worker._free_slots = asyncio.Queue()
+    for slot in range(2):
+        worker._free_slots.put_nowait(slot)
+    worker._request_queue = queue.Queue()
+    worker._process = AliveProcess()
+    yield worker
+    for shm in worker._slots:
+        shm.close()
+        shm.unlink()
+
+
+def _frames(count: int):
+    return [np.full((48, 64, 3), index, dtype=np.uint8) for index in range(count)]
+
+
+async def test_slots_are_released_after_response(worker):
+    task = asyncio.create_task(worker.detect_batch(_frames(2), {}))
+    await asyncio.sleep(0)
+    request_id, frames_meta, _ = worker._request_queue.get_nowait()
+    assert [slot for slot, _, _ in frames_meta] == [0, 1]
+    assert worker._free_slots.qsize() == 0
+
+    worker._resolve(request_id, ["a", "b"], None)
+
+    assert await task == ["a", "b"]
+    assert worker._free_slots.qsize() == 2
+
+
+async def test_cancelled_request_keeps_slots_until_response(worker):
+    """待機がキャンセルされても、ワーカーの応答が届くまではスロットを再利用しない"""
+    task = asyncio.create_task(worker.detect_batch(_frames(2), {}))
+    await asyncio.sleep(0)
+    request_id, _, _ = worker._request_queue.get_nowait()
+
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert worker._free_slots.qsize() == 0
+
+    worker._resolve(request_id, ["a", "b"], None)
+    assert worker._free_slots.qsize() == 2
+
+
+async def test_slots_are_released_when_worker_fails(worker):
+    task = asyncio.create_task(worker.detect_batch(_frames(1), {}))
+    await asyncio.sleep(0)
+
+    worker._fail_pending(RuntimeError("Inference worker exited unexpectedly"))
+
+    with pytest.raises(RuntimeError, match="exited"):
+        await task
+    assert worker._free_slots.qsize() == 2
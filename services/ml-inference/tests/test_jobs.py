@@ -0,0 +1,80 @@
+"""jobs (JobStore) のテスト"""
+
+import jobs
+from jobs import JobStore
+
+
+class FakeClock:
+    """time.monotonic の代わりに使う手動で進める時計"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _store(monkeypatch, ttl_seconds: float = 60.0):
+    clock = FakeClock()
+    monkeypatch.setattr(jobs.time, "monotonic", clock)
+    return JobStore(ttl_seconds=ttl_seconds), clock
+
+
+def test_get_returns_copy(monkeypatch):
+    store, _ = _store(monkeypatch)
+    store.create("job", status="processing", progress=0.0)
+
+    job = store.get("job")
+    job["status"] = "changed"
+
+    assert store.get("job") == {"status": "processing", "progress": 0.0}
+    assert store.get("missing") is None
+
+
+def test_finished_job_is_evicted_after_ttl(monkeypatch):
+    store, clock = _store(monkeypatch, ttl_seconds=60.0)
+    store.create("job", status="processing")
+    store.update("job", status="completed", result={"tracks": []})
+
+    clock.now += 59.0
+    assert store.get("job")["status"] == "completed"
+
+    clock.now += 2.0
+    assert store.get("job") is None
+    assert len(store) == 0
+
+
+def test_running_job_is_not_evicted(monkeypatch):
+    """処理中のジョブはTTLを過ぎても破棄しない"""
+    store, clock = _store(monkeypatch, ttl_seconds=60.0)
+    store.create("job", status="processing")
+    store.update("job", progress=0.5)
+
+    clock.now += 3600.0
+    assert store.get("job") == {"status": "processing", "progress": 0.5}
+
+
+def test_ttl_counts_from_first_finish(monkeypatch):
+    """終了後の更新ではTTLの起点を延長しない"""
+    store, clock = _store(monkeypatch, ttl_seconds=60.0)
+    store.create("job", status="processing")
+    store.update("job", status="error", error="failed")
+
+    clock.now += 30.0
+    store.update("job", status="error", error="failed again")
+
+    clock.now += 31.0
+    assert store.get("job") is None
+
+
+def test_update_of_evicted_job_is_ignored(monkeypatch):
+    store, clock = _store(monkeypatch, ttl_seconds=10.0)
+    store.create("job", status="completed")
+    store.update("job", status="completed")
+
+    clock.now += 11.0
+    store.create("other", status="processing")  # 登録時にも期限切れのジョブを破棄する
+    store.update("job", status="error")
+
+    assert store.get("job") is None
+    assert len(store) == 1
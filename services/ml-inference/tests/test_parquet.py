@@ -0,0 +1,95 @@
+"""pipeline のParquet出力 (_write_parquet / _read_parquet) のテスト"""
+
+import numpy as np
+import pytest
+
+from pipeline import BallData, PipelineResult, _ball_path, _read_parquet, _write_parquet
+
+pytest.importorskip("pyarrow")
+
+
+def _result() -> PipelineResult:
+    """process_video() と同じく、トラックを列リストのまま持つ結果"""
+    track_columns = {
+        "track_1": {
+            "frameNumber": [0, 1, 2],
+            "timestamp": [0.0, 1 / 30, 2 / 30],
+            "bbox": [(0.1, 0.2, 0.05, 0.1), (0.11, 0.21, 0.05, 0.1), (0.12, 0.22, 0.05, 0.1)],
+            "center": [(0.125, 0.25), (0.135, 0.26), (0.145, 0.27)],
+            "confidence": [0.9, 0.8, 0.7]
+        },
+        "track_7": {
+            "frameNumber": [2],
+            "timestamp": [2 / 30],
+            "bbox": [(0.5, 0.5, 0.02, 0.04)],
+            "center": [(0.51, 0.52)],
+            "confidence": [0.6]
+        }
+    }
+    ball = [
+        BallData(frameNumber=0, timestamp=0.0, position={"x": 0.5, "y": 0.25}, confidence=0.75, visible=True),
+        BallData(frameNumber=2, timestamp=2 / 30, position={"x": 0.625, "y": 0.5}, confidence=0.5, visible=True)
+    ]
+    metadata = {"videoPath": "input.mp4", "fps": 30.0, "tracksCount": 2, "ballDetectionsCount": 2}
+    return PipelineResult(ball=ball, metadata=metadata, track_columns=track_columns)
+
+
+def test_round_trip(tmp_path):
+    result = _result()
+    output_path = str(tmp_path / "output.parquet")
+
+    _write_parquet(result, output_path)
+    loaded = _read_parquet(output_path)
+
+    assert _ball_path(output_path).exists()
+    assert loaded.metadata == result.metadata
+    assert [track.trackId for track in loaded.tracks] == ["track_1", "track_7"]
+    for expected, track in zip(result.tracks, loaded.tracks, strict=True):
+        np.testing.assert_array_equal(track.frameNumber, expected.frameNumber)
+        np.testing.assert_array_equal(track.timestamp, expected.timestamp)
+        # 座標・信頼度はfloat32で保存される
+        np.testing.assert_allclose(track.bbox, expected.bbox, rtol=1e-6)
+        np.testing.assert_allclose(track.center, expected.center, rtol=1e-6)
+        np.testing.assert_allclose(track.confidence, expected.confidence, rtol=1e-6)
+
+    assert len(loaded.ball) == len(result.ball)
+    for expected, ball in zip(result.ball, loaded.ball, strict=True):
+        assert ball.frameNumber == expected.frameNumber
+        assert ball.timestamp == expected.timestamp
+        assert ball.visible == expected.visible
+        assert ball.position == pytest.approx(expected.position, rel=1e-6)
+        assert ball.confidence == pytest.approx(expected.confidence, rel=1e-6)
+
+
+def test_round_trip_matches_json_output(tmp_path):
+    """読み込んだ結果のJSON用dictが、元の結果と (float32の精度で) 一致する"""
+    result = _result()
+    output_path = str(tmp_path / "output.parquet")
+
+    _write_parquet(result, output_path)
+    loaded = _read_parquet(output_path).track_dicts()
+
+    expected = result.track_dicts()
+    assert [t["trackId"] for t in loaded] == [t["trackId"] for t in expected]
+    for loaded_track, expected_track in zip(loaded, expected, strict=True):
+        assert len(loaded_track["frames"]) == len(expected_track["frames"])
+        for loaded_frame, expected_frame in zip(
+            loaded_track["frames"], expected_track["frames"], strict=True
+        ):
+            assert loaded_frame["frameNumber"] == expected_frame["frameNumber"]
+            assert loaded_frame["timestamp"] == expected_frame["timestamp"]
+            assert loaded_frame["bbox"] == pytest.approx(expected_frame["bbox"], rel=1e-6)
+            assert loaded_frame["center"] == pytest.approx(expected_frame["center"], rel=1e-6)
+            assert loaded_frame["confidence"] == pytest.approx(expected_frame["confidence"], rel=1e-6)
+
+
+def test_empty_result_round_trip(tmp_path):
+    result = PipelineResult(metadata={"tracksCount": 0})
+    output_path = str(tmp_path / "empty.parquet")
+
+    _write_parquet(result, output_path)
+    loaded = _read_parquet(output_path)
+
+    assert loaded.tracks == []
+    assert loaded.ball == []
+    assert loaded.metadata == {"tracksCount": 0}
@@ -0,0 +1,75 @@
+"""api.decode_raw_frame (/detect/raw) のテスト"""
+
+import cv2
+import numpy as np
+import pytest
+
+from api import decode_raw_frame
+
+WIDTH, HEIGHT = 64, 48
+
+
+def _nv12(width: int = WIDTH, height: int = HEIGHT) -> bytes:
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, width * height * 3 // 2, dtype=np.uint8).tobytes()
+
+
+def test_bgr_is_returned_as_is():
+    frame = np.random.default_rng(0).integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+
+    decoded = decode_raw_frame(frame.tobytes(), WIDTH, HEIGHT, "bgr")
+
+    np.testing.assert_array_equal(decoded, frame)
+
+
+def test_nv12_is_converted_to_bgr():
+    data = _nv12()
+
+    decoded = decode_raw_frame(data, WIDTH, HEIGHT, "nv12")
+
+    expected = cv2.cvtColor(
+        np.frombuffer(data, dtype=np.uint8).reshape(HEIGHT * 3 // 2, WIDTH), cv2.COLOR_YUV2BGR_NV12
+    )
+    assert decoded.shape == (HEIGHT, WIDTH, 3)
+    np.testing.assert_array_equal(decoded, expected)
+
+
+def test_nv12_on_device_matches_cpu_conversion():
+    """デバイス指定時は (3, H, W) RGBテンソルを返し、OpenCVの変換と±1以内で一致する"""
+    torch = pytest.importorskip("torch")
+    data = _nv12()
+
+    tensor = decode_raw_frame(data, WIDTH, HEIGHT, "nv12", torch.device("cpu"))
+
+    assert isinstance(tensor, torch.Tensor)
+    assert tensor.dtype == torch.uint8 and tuple(tensor.shape) == (3, HEIGHT, WIDTH)
+    bgr = tensor.permute(1, 2, 0).flip(-1).numpy().astype(np.int16)
+    expected = decode_raw_frame(data, WIDTH, HEIGHT, "nv12").astype(np.int16)
+    assert np.abs(bgr - expected).max() <= 1
+
+
+@pytest.mark.parametrize("pixel_format, size", [
+    ("bgr", WIDTH * HEIGHT * 3 - 1),
+    ("bgr", WIDTH * HEIGHT * 3 // 2),
+    ("nv12", WIDTH * HEIGHT * 3),
+    ("nv12", WIDTH * HEIGHT * 3 // 2 + 1),
+])
+def test_wrong_length_is_rejected(pixel_format, size):
+    with pytest.raises(ValueError, match="Expected"):
+        decode_raw_frame(bytes(size), WIDTH, HEIGHT, pixel_format)
+
+
+@pytest.mark.parametrize("width, height, pixel_format", [
+    (0, HEIGHT, "bgr"),
+    (WIDTH, -1, "bgr"),
+    (WIDTH + 1, HEIGHT, "nv12"),
+    (WIDTH, HEIGHT + 1, "nv12"),
+])
+def test_invalid_size_is_rejected(width, height, pixel_format):
+    with pytest.raises(ValueError):
+        decode_raw_frame(bytes(WIDTH * HEIGHT * 3), width, height, pixel_format)
+
+
+def test_unsupported_format_is_rejected():
+    with pytest.raises(ValueError, match="Unsupported"):
+        decode_raw_frame(bytes(WIDTH * HEIGHT * 2), WIDTH, HEIGHT, "yuyv")
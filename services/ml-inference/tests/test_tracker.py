@@ -0,0 +1,98 @@
+"""tracker のテスト"""
+
+import numpy as np
+
+from detector import Detections
+from tracker import ObjectTracker, _normalize_tracked
+
+NAMES = {0: "person", 32: "sports ball"}
+
+
+def _scalar_normalize(xyxy: np.ndarray, width: int, height: int):
+    """ベクトル化前 (numpy 1.26) と同じスカラー演算での正規化 (差はfloat32、除算はfloat64)"""
+    rows = []
+    for x1, y1, x2, y2 in xyxy:
+        w, h = float(x2 - x1) / width, float(y2 - y1) / height
+        rows.append((float(x1) / width, float(y1) / height, w, h))
+    return rows
+
+
+def test_normalize_tracked_matches_scalar_conversion():
+    """正規化座標と、そこから描画時に求めるピクセル座標がスカラー演算の結果と一致する"""
+    rng = np.random.default_rng(0)
+    x1 = rng.uniform(0, 1800, 2000)
+    y1 = rng.uniform(0, 1000, 2000)
+    xyxy = np.stack(
+        [x1, y1, x1 + rng.uniform(1, 120, 2000), y1 + rng.uniform(1, 80, 2000)], axis=1
+    ).astype(np.float32)
+
+    bboxes, centers = _normalize_tracked(xyxy, np.array([1920, 1080], dtype=np.float64))
+    expected = _scalar_normalize(xyxy, 1920, 1080)
+
+    np.testing.assert_array_equal(bboxes, np.array(expected, dtype=np.float64))
+    np.testing.assert_array_equal(centers, bboxes[:, :2] + bboxes[:, 2:] / 2)
+
+    # 描画時の int() による切り捨てでも1pxもずれない
+    for width, height in [(1920, 1080), (1280, 720)]:
+        scale = np.array([width, height], dtype=np.float64)
+        corners = np.empty((len(bboxes), 4), dtype=np.int32)
+        corners[:, :2] = bboxes[:, :2] * scale
+        corners[:, 2:] = (bboxes[:, :2] + bboxes[:, 2:]) * scale
+        assert corners.tolist() == [
+            [int(x * width), int(y * height), int((x + w) * width), int((y + h) * height)]
+            for x, y, w, h in expected
+        ]
+
+
+def _moving_players(num_frames: int):
+    """2人の選手が右へ移動するフレームごとの検出結果"""
+    for frame in range(num_frames):
+        x = 0.1 + 0.005 * frame
+        yield Detections(
+            bbox=np.array([[x, 0.2, 0.05, 0.1], [x + 0.4, 0.5, 0.05, 0.1]], dtype=np.float64),
+            confidence=np.array([0.9, 0.8], dtype=np.float32),
+            class_id=np.array([0, 0], dtype=np.int32),
+            names=NAMES
+        )
+
+
+def _run(tracker: ObjectTracker, num_frames: int = 10):
+    return [tracker.update(detections, frame_number=frame)
+            for frame, detections in enumerate(_moving_players(num_frames))]
+
+
+def _without_ids(frames):
+    return [[(t.frame_number, t.bbox, t.center, t.class_name) for t in tracked] for tracked in frames]
+
+
+def test_reset_discards_track_state():
+    """reset() 後は新しい動画として扱われ、トラックIDを除いて最初と同じ結果になる"""
+    tracker = ObjectTracker(frame_rate=30)
+    first = _run(tracker)
+    assert all(len(tracked) == 2 for tracked in first[1:])
+
+    tracker.reset()
+    assert tracker.current_frame == 0
+    second = _run(tracker)
+
+    assert _without_ids(second) == _without_ids(first)
+    # 以前の動画のトラックは引き継がない
+    first_ids = {t.track_id for tracked in first for t in tracked}
+    second_ids = {t.track_id for tracked in second for t in tracked}
+    assert first_ids.isdisjoint(second_ids)
+    assert len(second_ids) == 2
+
+
+def test_reset_without_bytetrack_reset(monkeypatch):
+    """ByteTrack.reset() がないsupervision (0.18) では同じ設定のByteTrackを作り直す"""
+    tracker = ObjectTracker(lost_track_buffer=45, frame_rate=25)
+    old = tracker.tracker
+    monkeypatch.delattr(type(old), "reset", raising=False)
+
+    _run(tracker, 3)
+    tracker.reset()
+
+    assert tracker.tracker is not old
+    assert tracker.tracker.frame_id == 0
+    assert tracker.tracker.tracked_tracks == []
+    assert tracker.tracker.max_time_lost == old.max_time_lost
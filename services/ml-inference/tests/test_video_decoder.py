@@ -0,0 +1,155 @@
+"""video_decoder (ParallelVideoDecoder) のテスト"""
+
+import queue
+from multiprocessing import shared_memory
+
+import cv2
+import numpy as np
+import pytest
+
+from video_decoder import FrameRingBuffer, ParallelVideoDecoder, _decode_into_slots
+
+NUM_FRAMES = 40
+WIDTH, HEIGHT = 64, 48
+
+
+@pytest.fixture(scope="module")
+def video_path(tmp_path_factory) -> str:
+    """フレームごとに内容が異なる短い動画"""
+    path = str(tmp_path_factory.mktemp("video") / "frames.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (WIDTH, HEIGHT))
+    assert writer.isOpened()
+    for index in range(NUM_FRAMES):
+        frame = np.full((HEIGHT, WIDTH, 3), (index * 6) % 256, dtype=np.uint8)
+        cv2.putText(frame, str(index), (4, 40), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (255, 255, 255), 2)
+        writer.write(frame)
+    writer.release()
+    return path
+
+
+def _sequential_frames(video_path: str):
+    """1プロセスで先頭から順にデコードしたフレーム"""
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def _assert_unlinked(names):
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+@pytest.mark.parametrize("num_workers, chunk_size, skip_frames", [
+    (2, 8, 0),
+    (3, 7, 0),
+    (2, 8, 2),
+])
+def test_frames_are_returned_in_order(video_path, num_workers, chunk_size, skip_frames):
+    """チャンクを複数プロセスでデコードしても、1プロセスでの順次デコードと同じフレームが同じ順に返る"""
+    expected = _sequential_frames(video_path)
+    assert len(expected) == NUM_FRAMES
+
+    decoder = ParallelVideoDecoder(
+        video_path, NUM_FRAMES, num_workers=num_workers, chunk_size=chunk_size, skip_frames=skip_frames
+    )
+    with decoder:
+        frames = list(decoder)
+
+    step = skip_frames + 1
+    assert [frame_number for frame_number, _ in frames] == list(range(0, NUM_FRAMES, step))
+    for frame_number, frame in frames:
+        np.testing.assert_array_equal(frame, expected[frame_number])
+
+
+def test_iter_into_ring_buffer(video_path):
+    """リングバッファのスロットへコピーしながら読み出せる (スロットは読み出し順に再利用される)"""
+    expected = _sequential_frames(video_path)
+    ring = FrameRingBuffer(2, (HEIGHT, WIDTH, 3))
+
+    with ParallelVideoDecoder(video_path, NUM_FRAMES, num_workers=2, chunk_size=8) as decoder:
+        for frame_number, frame in decoder.iter_into(ring.acquire):
+            np.testing.assert_array_equal(frame, expected[frame_number])
+            ring.release()
+
+
+def test_shared_memory_is_released_on_close(video_path):
+    decoder = ParallelVideoDecoder(video_path, NUM_FRAMES, num_workers=2, chunk_size=8)
+    decoder.start()
+    names = [shm.name for shm in decoder._shms]
+    processes = list(decoder._processes)
+    assert len(names) == 2
+
+    # 途中まで読んだところで閉じる
+    iterator = iter(decoder)
+    for _ in range(5):
+        next(iterator)
+    iterator.close()
+    decoder.close()
+
+    _assert_unlinked(names)
+    assert not any(process.is_alive() for process in processes)
+
+
+def test_unopenable_video_fails_before_allocating(tmp_path):
+    """開けない動画ではワーカーが起動前に失敗し、共有メモリは確保されない"""
+    decoder = ParallelVideoDecoder(str(tmp_path / "missing.avi"), NUM_FRAMES, num_workers=2)
+    with pytest.raises(ValueError):
+        decoder.start()
+    assert decoder._shms == []
+
+
+class FakeCapture:
+    """指定した枚数だけフレームを返し、その後は読み込みに失敗するキャプチャ"""
+
+    def __init__(self, frames):
+        self.frames = list(frames)
+
+    def set(self, prop, value):
+        return True
+
+    def read(self, image=None):
+        if not self.frames:
+            return False, None
+        return True, self.frames.pop(0)
+
+
+def test_slot_is_returned_when_read_fails():
+    """動画が予定より早く終わっても、取得したスロットは空きキューに戻る"""
+    views = [np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8) for _ in range(2)]
+    free_queue, out_queue = queue.Queue(), queue.Queue()
+    for slot in range(2):
+        free_queue.put(slot)
+
+    cap = FakeCapture([np.full((HEIGHT, WIDTH, 3), 7, dtype=np.uint8)])
+    _decode_into_slots(cap, [(0, 4)], 0, views, free_queue, out_queue)
+
+    assert out_queue.get_nowait()[:2] == ("frame", 0)
+    assert out_queue.get_nowait() == ("end", 0, None)
+    assert free_queue.qsize() == 1
+    np.testing.assert_array_equal(views[0], 7)
+
+
+def test_frame_shape_change_is_rejected():
+    """途中でフレームサイズが変わる場合はスロットへのコピーで落ちず、形状を示して失敗する"""
+    views = [np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)]
+    free_queue, out_queue = queue.Queue(), queue.Queue()
+    free_queue.put(0)
+
+    cap = FakeCapture([np.zeros((WIDTH, HEIGHT, 3), dtype=np.uint8)])
+    with pytest.raises(ValueError, match="shape"):
+        _decode_into_slots(cap, [(0, 1)], 0, views, free_queue, out_queue)
+
+
+def test_iter_into_rejects_mismatched_output(video_path):
+    ring = FrameRingBuffer(2, (WIDTH, HEIGHT, 3))
+
+    with ParallelVideoDecoder(video_path, NUM_FRAMES, num_workers=2, chunk_size=8) as decoder:
+        with pytest.raises(ValueError, match="does not match"):
+            next(decoder.iter_into(ring.acquire))